@@ -0,0 +1,363 @@
+"""Measure the builder's own overhead against a fake engine, local plugin remotes and synthetic projects
+
+    python benchmark.py [--output results.json] [--log-lines N] [--log-rate LINES_PER_S] ...
+    python benchmark.py compare old.json new.json
+
+Everything runs offscreen in a scratch directory that also serves as HOME and
+XDG_CACHE_HOME, so the real caches, history and engine registry are left alone.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+PLUGIN_NAMES = ["MetaLidar", "roscontrol", "MathToolkit"]
+
+# Stands in for UnrealBuildTool: prints UBT style output at a given rate
+EMITTER = r'''
+import sys, time
+lines, rate = int(sys.argv[1]), float(sys.argv[2])
+actions = max(1, lines // 5)
+started = time.monotonic()
+batch = max(1, int(rate / 100)) if rate else 1000
+written = 0
+while written < lines:
+    chunk = []
+    for i in range(written, min(lines, written + batch)):
+        if i % 5 == 0:
+            chunk.append(f"[{i // 5 + 1}/{actions}] Compile [x64] Module.Bench{i % 50}.cpp")
+        else:
+            chunk.append(f"/bench/Source/Bench{i % 50}/File{i}.cpp({i % 300}): warning: unused variable 'v{i}'")
+    sys.stdout.write("\n".join(chunk) + "\n")
+    sys.stdout.flush()
+    written += len(chunk)
+    if rate:
+        delay = started + written / rate - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+'''
+
+STARTUP = r'''
+import sys, time, json
+started = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+import main
+from PyQt5.QtWidgets import QApplication
+imported = time.perf_counter()
+app = QApplication([])
+window = main.ROSUESetupGUI()
+window.show()
+app.processEvents()
+shown = time.perf_counter()
+print(json.dumps({"import": imported - started, "window": shown - imported, "total": shown - started}))
+'''
+
+def git(*args, cwd=None):
+    subprocess.run(["git"] + list(args), cwd=cwd, check=True, capture_output=True)
+
+def make_fake_engine(root, lines, rate):
+    """An engine root whose Build.sh prints lines of UBT output at rate lines per second (0 = unthrottled)"""
+    script_dir = os.path.join(root, "Engine", "Build", "BatchFiles", "Linux")
+    os.makedirs(script_dir, exist_ok=True)
+    with open(os.path.join(root, "Engine", "Build", "Build.version"), 'w') as f:
+        json.dump({"MajorVersion": 5, "MinorVersion": 4, "PatchVersion": 0, "BranchName": "benchmark"}, f)
+    with open(os.path.join(root, "emit.py"), 'w') as f:
+        f.write(EMITTER)
+    build_script = os.path.join(script_dir, "Build.sh")
+    with open(build_script, 'w') as f:
+        f.write(f'#!/bin/sh\nexec "{sys.executable}" "{os.path.join(root, "emit.py")}" {lines} {rate}\n')
+    os.chmod(build_script, 0o755)
+    return root
+
+def make_plugin_remotes(root, files, commits):
+    """Bare repositories standing in for the plugin URLs, returns ROSUE_PLUGINS style (url, name) pairs"""
+    plugins = []
+    for name in PLUGIN_NAMES:
+        source = os.path.join(root, "src", name)
+        os.makedirs(os.path.join(source, "Source", name))
+        with open(os.path.join(source, f"{name}.uplugin"), 'w') as f:
+            json.dump({"FileVersion": 3, "FriendlyName": name, "Modules": [{"Name": name, "Type": "Runtime"}]}, f)
+        git("init", "-q", cwd=source)
+        for commit in range(commits):
+            for index in range(files):
+                with open(os.path.join(source, "Source", name, f"File{index}.cpp"), 'w') as f:
+                    f.write(f"// commit {commit}\n" + f"int value{index} = {commit};\n" * 64)
+            git("add", "-A", cwd=source)
+            git("-c", "user.name=bench", "-c", "user.email=bench@localhost", "commit", "-q", "-m", f"commit {commit}",
+                cwd=source)
+        url = os.path.join(root, f"{name}.git")
+        git("clone", "-q", "--bare", source, url)
+        plugins.append((url, name))
+    return plugins
+
+def make_project(root, name, files=0, file_size=0):
+    """A C++ project, with files of file_size bytes spread over its and its plugins' cache directories"""
+    project_dir = os.path.join(root, name)
+    os.makedirs(os.path.join(project_dir, "Source", name), exist_ok=True)
+    with open(os.path.join(project_dir, f"{name}.uproject"), 'w') as f:
+        json.dump({"FileVersion": 3, "EngineAssociation": "5.4", "Modules": [{"Name": name, "Type": "Runtime"}]},
+                  f, indent=4)
+    with open(os.path.join(project_dir, "Source", name, f"{name}.cpp"), 'w') as f:
+        f.write("int main() { return 0; }\n")
+    cache_dirs = ["Binaries", "Intermediate", "Saved", "DerivedDataCache"]
+    cache_dirs += [os.path.join("Plugins", plugin, cache) for plugin in PLUGIN_NAMES
+                   for cache in ("Binaries", "Intermediate")]
+    block = os.urandom(min(file_size, 1 << 20)) if file_size else b""
+    for index in range(files):
+        directory = os.path.join(project_dir, cache_dirs[index % len(cache_dirs)], f"dir{index % 37}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"file{index}.bin"), 'wb') as f:
+            remaining = file_size
+            while remaining > 0:
+                f.write(block[:remaining])
+                remaining -= len(block)
+    return os.path.join(project_dir, f"{name}.uproject")
+
+def summarize(samples):
+    return {"median": round(statistics.median(samples), 4), "min": round(min(samples), 4),
+            "max": round(max(samples), 4), "samples": [round(sample, 4) for sample in samples]}
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))] if values else 0
+
+class LatencyProbe:
+    """Measure how late a fast timer fires, which is how long the event loop was busy elsewhere"""
+
+    def __init__(self, interval_ms=10):
+        from PyQt5.QtCore import Qt, QTimer
+        self.interval = interval_ms / 1000
+        self.timer = QTimer()
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.tick)
+        self.delays = []
+        self.last = None
+
+    def start(self):
+        self.last = time.perf_counter()
+        self.timer.start()
+
+    def tick(self):
+        now = time.perf_counter()
+        self.delays.append(max(0.0, now - self.last - self.interval))
+        self.last = now
+
+    def stop(self):
+        self.timer.stop()
+        milliseconds = [delay * 1000 for delay in self.delays]
+        return {"samples": len(milliseconds),
+                "p50_ms": round(percentile(milliseconds, 0.5), 2),
+                "p95_ms": round(percentile(milliseconds, 0.95), 2),
+                "p99_ms": round(percentile(milliseconds, 0.99), 2),
+                "max_ms": round(max(milliseconds, default=0), 2)}
+
+def wait_for(signal, timeout=600):
+    """Run the event loop until signal is emitted, returns its arguments"""
+    from PyQt5.QtCore import QEventLoop, QTimer
+    loop = QEventLoop()
+    result = []
+    def done(*args):
+        result.append(args)
+        loop.quit()
+    signal.connect(done)
+    QTimer.singleShot(int(timeout * 1000), loop.quit)
+    loop.exec_()
+    signal.disconnect(done)
+    if not result:
+        raise Exception(f"Timed out after {timeout}s")
+    return result[0]
+
+def bench_startup(repeat):
+    samples = {"import": [], "window": [], "total": [], "process": []}
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", STARTUP, REPO_DIR], capture_output=True, text=True,
+                                env=os.environ)
+        if result.returncode != 0:
+            raise Exception(f"Startup benchmark failed: {result.stderr.strip()}")
+        samples["process"].append(time.perf_counter() - started)
+        for key, value in json.loads(result.stdout.strip().splitlines()[-1]).items():
+            samples[key].append(value)
+    return {key: summarize(values) for key, values in samples.items()}
+
+def bench_log(workdir, lines, rate):
+    """Stream the fake build through the GUI's log view and watch the event loop meanwhile"""
+    import main
+    from PyQt5.QtWidgets import QApplication
+    engine = make_fake_engine(os.path.join(workdir, "engine"), lines, rate)
+    project = make_project(os.path.join(workdir, "log"), "LogBench")
+    window = main.ROSUESetupGUI()
+    window.unreal_engine_path = engine
+    window.selected_project = project
+    window.create_project_setup()
+    # Without the result dialogs, which would block the loop
+    window.setup.step_finished.disconnect(window.step_finished)
+    window.setup.finished.disconnect(window.setup_finished)
+    window.setup.force_build = True
+    window.setup.use_binary_cache = False
+    window.setup.record_history = False
+
+    probe = LatencyProbe()
+    probe.start()
+    started = time.perf_counter()
+    window.setup.run(["compile"], skip_valid=False)
+    success, = wait_for(window.setup.finished)
+    built = time.perf_counter()
+    # The view is done once the last batch was rendered
+    while window.log_flush_timer.isActive():
+        QApplication.processEvents()
+    shown = time.perf_counter()
+    latency = probe.stop()
+    window.log_buffer.close()
+    window.close()
+    return {"success": success, "lines": lines, "rate": rate,
+            "build_seconds": round(built - started, 4), "shown_seconds": round(shown - started, 4),
+            "lines_per_second": round(lines / (shown - started)), "event_loop_latency": latency}
+
+def bench_clone(workdir, repeat):
+    from setup_core import ProjectSetup
+    from mirror_cache import MirrorCache
+    mirrors = os.path.join(workdir, "mirrors")
+    results = {}
+    for mode in ("cold", "warm"):
+        samples = []
+        for index in range(repeat):
+            if mode == "cold":
+                shutil.rmtree(mirrors, ignore_errors=True)
+            project = make_project(os.path.join(workdir, "clone"), f"Clone{mode}{index}")
+            setup = ProjectSetup(project, None)
+            setup.mirror_cache = MirrorCache(mirrors)
+            setup.record_history = False
+            started = time.perf_counter()
+            setup.run(["plugins"], skip_valid=False)
+            success, = wait_for(setup.finished)
+            if not success:
+                raise Exception(f"Cloning failed: {setup.summary()['error']}")
+            samples.append(time.perf_counter() - started)
+            setup.deleteLater()
+        results[mode] = summarize(samples)
+    return results
+
+def bench_cache_clear(workdir, repeat, files, file_size):
+    from setup_core import ProjectSetup
+    from directory_cache import directory_size
+    visible, background = [], []
+    size = 0
+    for index in range(repeat):
+        project = make_project(os.path.join(workdir, "clear"), f"Clear{index}", files, file_size)
+        size = directory_size(os.path.dirname(project))
+        setup = ProjectSetup(project, None)
+        setup.clear_cache = True
+        setup.record_history = False
+        started = time.perf_counter()
+        setup.run(["clear"], skip_valid=False)
+        # The step only renames, the files are deleted by the background deleter
+        visible.append(time.perf_counter() - started)
+        wait_for(setup.deleter.finished)
+        background.append(time.perf_counter() - started)
+        setup.deleteLater()
+    return {"files": files, "bytes": size, "until_step_done": summarize(visible),
+            "until_deleted": summarize(background)}
+
+def commit_id():
+    result = subprocess.run(["git", "-C", REPO_DIR, "rev-parse", "--short", "HEAD"], capture_output=True, text=True)
+    return result.stdout.strip() or None
+
+def run(args):
+    workdir = os.path.abspath(args.workdir) if args.workdir else tempfile.mkdtemp(prefix="rosue-bench-")
+    os.makedirs(os.path.join(workdir, "home"), exist_ok=True)
+    # Before the project modules are imported, some of them resolve paths below HOME at import time
+    os.environ["HOME"] = os.path.join(workdir, "home")
+    os.environ["XDG_CACHE_HOME"] = os.path.join(workdir, "cache")
+    os.environ["ROSUE_MIRROR_CACHE"] = os.path.join(workdir, "cache", "mirrors")
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    sys.path.insert(0, REPO_DIR)
+    import setup_core
+    from PyQt5.QtCore import QT_VERSION_STR
+    from PyQt5.QtWidgets import QApplication
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    try:
+        setup_core.ROSUE_PLUGINS[:] = make_plugin_remotes(os.path.join(workdir, "remotes"),
+                                                          args.plugin_files, args.plugin_commits)
+        results = {
+            "startup": bench_startup(args.repeat),
+            "log": bench_log(workdir, args.log_lines, args.log_rate),
+            "clone": bench_clone(workdir, args.repeat),
+            "cache_clear": bench_cache_clear(workdir, args.repeat, args.project_files, args.file_size)
+        }
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+    del app
+    return {
+        "commit": commit_id(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": {"python": platform.python_version(), "qt": QT_VERSION_STR,
+                        "platform": platform.platform(), "cpus": os.cpu_count()},
+        "parameters": {key: value for key, value in vars(args).items() if key not in ("output", "workdir", "keep")},
+        "results": results
+    }
+
+def flatten(results, prefix=""):
+    values = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            values.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            values[prefix + key] = value
+    return values
+
+def compare(old_path, new_path):
+    with open(old_path, 'r') as f:
+        old = json.load(f)
+    with open(new_path, 'r') as f:
+        new = json.load(f)
+    old_values, new_values = flatten(old["results"]), flatten(new["results"])
+    print(f"{'':48} {old.get('commit') or 'old':>12} {new.get('commit') or 'new':>12} {'change':>8}")
+    for key in sorted(set(old_values) & set(new_values)):
+        if key.endswith(".samples") or ".samples." in key:
+            continue
+        before, after = old_values[key], new_values[key]
+        change = f"{100 * (after - before) / before:+.0f}%" if before else ""
+        print(f"{key:48} {before:12.4g} {after:12.4g} {change:>8}")
+
+def main(argv):
+    if argv[:1] == ["compare"]:
+        if len(argv) != 3:
+            print("Usage: benchmark.py compare OLD.json NEW.json")
+            return 1
+        compare(argv[1], argv[2])
+        return 0
+    parser = argparse.ArgumentParser(description="Benchmark the builder against a fake engine and fake remotes.")
+    parser.add_argument("--output", default="-", help="write the JSON results to this file (default: stdout)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs of the startup, clone and clear benchmarks")
+    parser.add_argument("--log-lines", type=int, default=100000, help="lines printed by the fake Build.sh")
+    parser.add_argument("--log-rate", type=float, default=0,
+                        help="lines per second printed by the fake Build.sh, 0 for as fast as possible")
+    parser.add_argument("--plugin-files", type=int, default=200, help="source files in every fake plugin")
+    parser.add_argument("--plugin-commits", type=int, default=5, help="commits in every fake plugin")
+    parser.add_argument("--project-files", type=int, default=2000, help="files in the cache directories to clear")
+    parser.add_argument("--file-size", type=int, default=16384, help="size of every cache file in bytes")
+    parser.add_argument("--workdir", help="scratch directory (default: a new temporary directory)")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch directory")
+    args = parser.parse_args(argv)
+
+    output = json.dumps(run(args), indent=4)
+    if args.output == "-":
+        print(output)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
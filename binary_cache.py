@@ -0,0 +1,221 @@
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import itertools
+
+from directory_cache import DirectoryCache, cache_main, directory_size
+
+# Entries are evicted least recently used first once the cache grows past this size
+DEFAULT_MAX_SIZE = 10 * 1024 ** 3
+OUTPUT_DIRS = ["Binaries", "Intermediate"]
+ENTRY_FILE = "rosue-entry.json"
+# Written into a plugin to remember which cache key the outputs of each configuration belong to
+KEY_MARKER_DIR = os.path.join("Intermediate", "ROSUE")
+# Part of every key, bumped when what an entry holds changes
+ENTRY_LAYOUT = 2
+
+_counter = itertools.count()
+
+def default_cache_root():
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.environ.get("ROSUE_BINARY_CACHE") or os.path.join(cache_home, "rosue", "binaries")
+
+def default_max_size():
+    value = os.environ.get("ROSUE_BINARY_CACHE_MAX_MB")
+    return int(value) * 1024 ** 2 if value else DEFAULT_MAX_SIZE
+
+def plugin_dependencies(plugin_dir):
+    """Names of the plugins a plugin depends on according to its .uplugin"""
+    names = []
+    for entry in sorted(os.listdir(plugin_dir)):
+        if entry.endswith(".uplugin"):
+            try:
+                with open(os.path.join(plugin_dir, entry), 'r') as f:
+                    names += [p.get("Name") for p in json.load(f).get("Plugins", []) if p.get("Name")]
+            except (OSError, ValueError, AttributeError):
+                pass
+    return sorted(set(names))
+
+def target_type(target):
+    """Plugin binaries are shared by every project's editor, only the kind of target matters"""
+    for suffix in ("Editor", "Server", "Client"):
+        if target.endswith(suffix):
+            return suffix
+    return "Game"
+
+def cache_key(plugin, commit, engine, config, dependencies=None):
+    """Content address of a plugin's build outputs
+
+    engine is the parsed Build.version, config (target type, platform,
+    configuration) and dependencies map plugin names to the commits they
+    were built against.
+    """
+    description = json.dumps({"plugin": plugin, "commit": commit, "engine": engine, "config": list(config),
+                              "dependencies": dependencies or {}, "layout": ENTRY_LAYOUT}, sort_keys=True)
+    return f"{plugin}-{hashlib.sha1(description.encode()).hexdigest()[:16]}"
+
+def key_marker_path(plugin_dir, config):
+    return os.path.join(plugin_dir, KEY_MARKER_DIR, f"binary-cache-key-{'-'.join(config)}")
+
+def read_key_marker(plugin_dir, config):
+    try:
+        with open(key_marker_path(plugin_dir, config), 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def write_key_marker(plugin_dir, config, key):
+    path = key_marker_path(plugin_dir, config)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(key)
+
+def clear_key_marker(plugin_dir, config):
+    try:
+        os.remove(key_marker_path(plugin_dir, config))
+    except OSError:
+        pass
+
+def is_config_output(path, config):
+    """Whether a path below Binaries/ or Intermediate/ is an output of config
+
+    UBT names the build products of a (target type, platform, configuration)
+    after the target, e.g. Binaries/Linux/libUnrealEditor-Plugin.so for
+    Development and libUnrealEditor-Plugin-Linux-DebugGame.so otherwise, and
+    puts intermediates below Intermediate/Build/Linux/UnrealEditor/Development,
+    with the generated headers all configurations share in .../UnrealEditor/Inc.
+    """
+    kind, platform, configuration = config
+    target = f"Unreal{kind}"
+    parts = path.split(os.sep)
+    if parts[0] == "Intermediate":
+        return target in parts and (configuration in parts or "Inc" in parts)
+    name = parts[-1][3:] if parts[-1].startswith("lib") else parts[-1]
+    if not name.startswith((f"{target}-", f"{target}.")):
+        return False
+    if configuration == "Development":
+        return f"-{platform}-" not in name
+    return f"-{platform}-{configuration}" in name
+
+def config_outputs(plugin_dir, config):
+    """Paths of the outputs of config below plugin_dir, relative to it"""
+    paths = []
+    for name in OUTPUT_DIRS:
+        for root, _, names in os.walk(os.path.join(plugin_dir, name)):
+            for file_name in names:
+                path = os.path.relpath(os.path.join(root, file_name), plugin_dir)
+                if is_config_output(path, config):
+                    paths.append(path)
+    return paths
+
+def touch_outputs(plugin_dir, paths):
+    """Give restored files fresh timestamps in their original order
+
+    The plugin sources were checked out after the cached outputs were built,
+    UBT would consider every output out of date if they kept their old times.
+    """
+    files = []
+    for path in paths:
+        path = os.path.join(plugin_dir, path)
+        if not os.path.islink(path):
+            files.append((os.lstat(path).st_mtime_ns, path))
+    now = time.time_ns()
+    for rank, (_, path) in enumerate(sorted(files)):
+        # One microsecond apart keeps every dependency older than what was built from it
+        stamp = now + rank * 1000
+        os.utime(path, ns=(stamp, stamp))
+
+class BinaryCache(DirectoryCache):
+    """Build outputs of the ROSUE plugins shared by every project on the machine
+
+    Entries hold the files of a plugin's Binaries/ and Intermediate/
+    directories that belong to one configuration, see is_config_output, and
+    are addressed by cache_key, so a project building a plugin commit that
+    any project already built with the same engine and configuration copies
+    the outputs instead of compiling them. The outputs of the plugin's other
+    configurations are left alone.
+    """
+
+    def __init__(self, root=None):
+        super().__init__(root or default_cache_root())
+
+    def default_max_size(self):
+        return default_max_size()
+
+    def entry_path(self, key):
+        return os.path.join(self.root, key)
+
+    def has_entry(self, key):
+        return os.path.exists(os.path.join(self.entry_path(key), ENTRY_FILE))
+
+    def touch(self, key):
+        self.touch_entry(self.entry_path(key))
+
+    def store(self, key, plugin_dir, config, info=None):
+        """Copy the plugin's outputs of config into the cache, returns the entry size or None if it was cached"""
+        if self.has_entry(key):
+            self.touch(key)
+            return None
+        os.makedirs(self.root, exist_ok=True)
+        # Copied next to the entry and renamed into place, readers never see half an entry
+        staging = os.path.join(self.root, f".staging-{os.getpid()}-{next(_counter)}")
+        try:
+            for path in config_outputs(plugin_dir, config):
+                os.makedirs(os.path.dirname(os.path.join(staging, path)), exist_ok=True)
+                shutil.copy2(os.path.join(plugin_dir, path), os.path.join(staging, path), follow_symlinks=False)
+            os.makedirs(staging, exist_ok=True)
+            with open(os.path.join(staging, ENTRY_FILE), 'w') as f:
+                json.dump(dict(info or {}, key=key, created=time.time()), f, indent=4)
+            size = directory_size(staging)
+            try:
+                os.rename(staging, self.entry_path(key))
+            except OSError:
+                # Another project stored the same key meanwhile
+                return None
+            self.touch(key)
+            return size
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def restore(self, key, plugin_dir, config):
+        """Replace the plugin's outputs of config with the cached ones, returns the bytes copied or None on a miss"""
+        entry = self.entry_path(key)
+        if not self.has_entry(key):
+            return None
+        self.touch(key)
+        for path in config_outputs(plugin_dir, config):
+            os.remove(os.path.join(plugin_dir, path))
+        restored = config_outputs(entry, config)
+        for path in restored:
+            os.makedirs(os.path.dirname(os.path.join(plugin_dir, path)), exist_ok=True)
+            shutil.copy2(os.path.join(entry, path), os.path.join(plugin_dir, path), follow_symlinks=False)
+        touch_outputs(plugin_dir, restored)
+        write_key_marker(plugin_dir, config, key)
+        return directory_size(entry)
+
+    def entry_info(self, name, path):
+        if not os.path.exists(os.path.join(path, ENTRY_FILE)):
+            return None
+        try:
+            with open(os.path.join(path, ENTRY_FILE), 'r') as f:
+                info = json.load(f)
+        except (OSError, ValueError):
+            info = {}
+        return {"key": name, "plugin": info.get("plugin"), "commit": info.get("commit")}
+
+    def evict(self, max_size=None, keep=()):
+        """Remove least recently used entries until the cache fits into max_size
+
+        Entries whose key is in keep are never removed. Returns the removed entries.
+        """
+        return self.evict_paths(max_size, {self.entry_path(key) for key in keep})
+
+def main(argv):
+    return cache_main(BinaryCache(), argv, "binary_cache.py", "entries",
+                      lambda entry: f"{entry['plugin'] or entry['key']} {(entry['commit'] or 'unknown')[:8]}")
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,148 @@
+import os
+import json
+import hashlib
+import tempfile
+import subprocess
+
+# Lives in Intermediate so clearing the cache also forgets the last build
+MANIFEST_PATH = os.path.join("Intermediate", "ROSUE", "build-manifest.json")
+MANIFEST_VERSION = 1
+
+def file_hash(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def input_files(project_path):
+    """Relative paths of every file that can influence the build of the project"""
+    project_dir = os.path.dirname(project_path)
+    files = [os.path.basename(project_path)]
+    source_dirs = [os.path.join(project_dir, "Source")]
+    plugins_dir = os.path.join(project_dir, "Plugins")
+    if os.path.isdir(plugins_dir):
+        for name in sorted(os.listdir(plugins_dir)):
+            plugin_dir = os.path.join(plugins_dir, name)
+            if not os.path.isdir(plugin_dir):
+                continue
+            files += [os.path.join("Plugins", name, entry) for entry in sorted(os.listdir(plugin_dir))
+                      if entry.endswith(".uplugin")]
+            source_dirs.append(os.path.join(plugin_dir, "Source"))
+    for source_dir in source_dirs:
+        for root, dirs, names in os.walk(source_dir):
+            dirs.sort()
+            files += [os.path.relpath(os.path.join(root, name), project_dir) for name in sorted(names)]
+    return files
+
+def scan_files(project_path, previous=None):
+    """Fingerprint the input files as {path: [size, mtime_ns, sha1]}
+
+    Files whose size and mtime match the previous scan keep their hash, only
+    the others are read again.
+    """
+    project_dir = os.path.dirname(project_path)
+    previous = previous or {}
+    files = {}
+    for relative in input_files(project_path):
+        try:
+            stat = os.stat(os.path.join(project_dir, relative))
+        except OSError:
+            continue
+        old = previous.get(relative)
+        if old and old[0] == stat.st_size and old[1] == stat.st_mtime_ns:
+            files[relative] = old
+        else:
+            files[relative] = [stat.st_size, stat.st_mtime_ns, file_hash(os.path.join(project_dir, relative))]
+    return files
+
+def plugin_heads(project_dir):
+    plugins_dir = os.path.join(project_dir, "Plugins")
+    heads = {}
+    if os.path.isdir(plugins_dir):
+        for name in sorted(os.listdir(plugins_dir)):
+            if os.path.exists(os.path.join(plugins_dir, name, ".git")):
+                result = subprocess.run(["git", "-C", os.path.join(plugins_dir, name), "rev-parse", "HEAD"],
+                                        capture_output=True, text=True)
+                heads[name] = result.stdout.strip() if result.returncode == 0 else None
+    return heads
+
+def engine_build_version(build_version_path):
+    try:
+        with open(build_version_path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def compute_state(project_path, build_version_path, config, previous=None):
+    """Everything a build of the project depends on, reusing hashes from the previous state"""
+    return {
+        "version": MANIFEST_VERSION,
+        "config": config,
+        "engine": engine_build_version(build_version_path),
+        "plugins": plugin_heads(os.path.dirname(project_path)),
+        "files": scan_files(project_path, (previous or {}).get("files"))
+    }
+
+def describe_changes(previous, current, limit=5):
+    """Human readable reasons why current needs a build that previous did not, empty if none"""
+    if not previous or previous.get("version") != MANIFEST_VERSION:
+        return ["no successful build recorded"]
+    reasons = []
+    if previous.get("config") != current["config"]:
+        reasons.append(f"build configuration changed to {current['config']}")
+    if previous.get("engine") != current["engine"]:
+        reasons.append("engine version changed")
+    old_heads, new_heads = previous.get("plugins", {}), current["plugins"]
+    for name in sorted(set(old_heads) | set(new_heads)):
+        if old_heads.get(name) != new_heads.get(name):
+            old, new = old_heads.get(name) or "none", new_heads.get(name) or "none"
+            reasons.append(f"plugin {name} moved {old[:8]} → {new[:8]}")
+    old_files, new_files = previous.get("files", {}), current["files"]
+    changed = sorted(path for path in set(old_files) | set(new_files)
+                     if path not in old_files or path not in new_files
+                     or old_files[path][2] != new_files[path][2])
+    if changed:
+        shown = ", ".join(changed[:limit]) + (f" and {len(changed) - limit} more" if len(changed) > limit else "")
+        reasons.append(f"{len(changed)} input files changed: {shown}")
+    return reasons
+
+def missing_outputs(project_dir, platform="Linux"):
+    """Binaries directories a previous build should have produced but which are gone"""
+    candidates = [os.path.join(project_dir, "Binaries", platform)]
+    plugins_dir = os.path.join(project_dir, "Plugins")
+    if os.path.isdir(plugins_dir):
+        for name in sorted(os.listdir(plugins_dir)):
+            if os.path.isdir(os.path.join(plugins_dir, name, "Source")):
+                candidates.append(os.path.join(plugins_dir, name, "Binaries", platform))
+    return [os.path.relpath(path, project_dir) for path in candidates
+            if not os.path.isdir(path) or not os.listdir(path)]
+
+def load_manifest(project_dir):
+    try:
+        with open(os.path.join(project_dir, MANIFEST_PATH), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save_manifest(project_dir, state):
+    path = os.path.join(project_dir, MANIFEST_PATH)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Concurrent builds of the project each write their own temporary file, see BuildMatrix
+    handle, temp_path = tempfile.mkstemp(prefix=".build-manifest.", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(handle, 'w') as f:
+            json.dump(state, f)
+        os.replace(temp_path, path)
+    except OSError:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+def clear_manifest(project_dir):
+    try:
+        os.remove(os.path.join(project_dir, MANIFEST_PATH))
+    except OSError:
+        pass
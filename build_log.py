@@ -0,0 +1,91 @@
+import os
+import re
+import time
+import codecs
+from collections import deque
+
+# Lines kept between two flushes to the log view, older ones only reach the spill file
+DEFAULT_MAX_LINES = 20000
+# Spilled logs kept in the log directory, oldest are deleted first
+KEEP_LOG_FILES = 20
+LINE_BREAK_RE = re.compile(r"\r\n|\r|\n")
+
+def default_log_dir():
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(cache_home, "rosue", "logs")
+
+class LineDecoder:
+    """Turn arbitrary chunks of process output into complete lines of text
+
+    Multibyte UTF-8 characters and \\r\\n pairs split across chunks are kept
+    until the rest arrives, an unterminated last line is held back until flush.
+    """
+
+    def __init__(self, encoding="utf-8"):
+        self.decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        self.partial = ""
+
+    def feed(self, data):
+        text = self.partial + self.decoder.decode(data)
+        held = ""
+        if text.endswith("\r"):
+            # Could be the first half of \r\n
+            text, held = text[:-1], "\r"
+        lines = LINE_BREAK_RE.split(text)
+        self.partial = lines.pop() + held
+        return lines
+
+    def flush(self):
+        text = (self.partial + self.decoder.decode(b"", final=True)).rstrip("\r")
+        self.partial = ""
+        return [text] if text else []
+
+class LogBuffer:
+    """Ring buffer of log lines waiting to be shown, with the full log spilled to a file
+
+    When more than max_lines arrive between two take() calls the oldest are
+    dropped from the buffer, they are still in the spill file.
+    """
+
+    def __init__(self, max_lines=DEFAULT_MAX_LINES, spill_path=None):
+        self.pending = deque(maxlen=max_lines)
+        self.dropped = 0
+        self.spill_path = spill_path
+        self.spill = None
+        if spill_path:
+            os.makedirs(os.path.dirname(spill_path), exist_ok=True)
+            self.spill = open(spill_path, "a", encoding="utf-8", buffering=1 << 16)
+
+    def extend(self, lines):
+        overflow = len(self.pending) + len(lines) - self.pending.maxlen
+        if overflow > 0:
+            self.dropped += overflow
+        self.pending.extend(lines)
+        if self.spill:
+            self.spill.write("\n".join(lines) + "\n")
+
+    def take(self):
+        """Return the pending lines and how many were dropped since the last call"""
+        lines, dropped = list(self.pending), self.dropped
+        self.pending.clear()
+        self.dropped = 0
+        if self.spill:
+            self.spill.flush()
+        return lines, dropped
+
+    def close(self):
+        if self.spill:
+            self.spill.close()
+            self.spill = None
+
+def new_log_path(log_dir=None, prefix="rosue"):
+    """Path for a new spilled log, removing the oldest logs beyond KEEP_LOG_FILES"""
+    log_dir = log_dir or default_log_dir()
+    if os.path.isdir(log_dir):
+        logs = sorted(name for name in os.listdir(log_dir) if name.endswith(".log"))
+        for name in logs[:max(0, len(logs) - KEEP_LOG_FILES + 1)]:
+            try:
+                os.remove(os.path.join(log_dir, name))
+            except OSError:
+                pass
+    return os.path.join(log_dir, f"{prefix}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.log")
@@ -0,0 +1,241 @@
+import os
+import time
+from PyQt5.QtCore import QObject, QProcess, QTimer, pyqtSignal
+
+from engine_registry import project_engine_root
+from build_memory import choose_parallel_actions
+from process_tree import memory_info
+from setup_core import ProjectSetup, has_target, project_name, target_name
+
+TARGETS = ["Editor", "Game", "Server"]
+CONFIGURATIONS = ["Development", "DebugGame", "Shipping"]
+# UnrealBuildTool directory of each target type below Intermediate/Build/Linux
+INTERMEDIATE_NAMES = {"Editor": "UnrealEditor", "Game": "UnrealGame", "Server": "UnrealServer",
+                      "Client": "UnrealClient"}
+
+def job_name(project_path, target, configuration):
+    return f"{project_name(project_path)} {target} {configuration}"
+
+def intermediate_key(project_path, target, overlap_targets=False):
+    """What a job writes that no other running job may write
+
+    Every build of a project writes its Intermediate directory: the rules
+    assembly in Intermediate/Build/BuildRules, the project's generated files
+    and ROSUE's build manifest, so by default a project builds one job at a
+    time. With overlap_targets only a target type's own directory, e.g.
+    Intermediate/Build/Linux/UnrealEditor with the generated headers all its
+    configurations share, is kept exclusive and builds of different target
+    types may run side by side, see BuildMatrix.
+    """
+    intermediate = os.path.join(os.path.dirname(os.path.abspath(project_path)), "Intermediate")
+    if not overlap_targets:
+        return intermediate
+    return os.path.join(intermediate, "Build", "Linux", INTERMEDIATE_NAMES[target])
+
+def ubt_log_path(project_path, target, configuration):
+    """Log of one job, concurrent UnrealBuildTool instances would otherwise share the engine's Log.txt"""
+    return os.path.join(os.path.dirname(os.path.abspath(project_path)), "Saved", "Logs",
+                        f"UBT-{target_name(project_path, target)}-{configuration}.txt")
+
+def format_matrix(results, targets=None, configurations=None):
+    """Text table with a row per project and target and a column per configuration"""
+    targets = targets or TARGETS
+    configurations = configurations or CONFIGURATIONS
+    projects = list(dict.fromkeys(result["project"] for result in results))
+    cells = {(result["project"], result["target"], result["configuration"]): result for result in results}
+    width = max([len(f"{project_name(project)} {target}") for project in projects for target in targets] + [6])
+    lines = [f"{'':{width}}  " + "  ".join(f"{configuration:>16}" for configuration in configurations)]
+    for project in projects:
+        for target in targets:
+            row = []
+            for configuration in configurations:
+                result = cells.get((project, target, configuration))
+                if result is None:
+                    text = "-"
+                elif result["status"] in ("success", "failed"):
+                    text = f"{'PASS' if result['status'] == 'success' else 'FAIL'} {result['seconds']:7.1f}s"
+                else:
+                    text = result["status"]
+                row.append(f"{text:>16}")
+            lines.append(f"{project_name(project) + ' ' + target:{width}}  " + "  ".join(row))
+    return "\n".join(lines)
+
+class BuildMatrix(QObject):
+    """Build every target and configuration of one or more projects with a shared concurrency budget
+
+    At most max_jobs builds run at a time and they share cpu_budget cores
+    (all of them by default) through -MaxParallelActions. Jobs writing the
+    same intermediate directories, see intermediate_key, never overlap.
+    Targets a project does not define are reported as "n/a".
+
+    By default only builds of different projects run concurrently. They
+    share the engine, which an installed engine only reads, and the compiler
+    cache, and each gets its own UnrealBuildTool log. With overlap_targets a
+    project's other target types start once its first job finished and built
+    the rules assembly, later builds only read it unless a Build.cs or
+    Target.cs changes during the run. Overlapping builds of a project still
+    share its build manifest, the last one to succeed records its state.
+    """
+    job_started = pyqtSignal(str)
+    job_output = pyqtSignal(str, list, bool)
+    job_finished = pyqtSignal(str, object)
+    finished = pyqtSignal(object)
+
+    def __init__(self, projects, engine_path, targets=None, configurations=None, max_jobs=2, cpu_budget=None,
+                 options=None, overlap_targets=False, parent=None):
+        super().__init__(parent)
+        self.projects = list(projects)
+        self.engine_path = engine_path
+        self.targets = list(targets or TARGETS)
+        self.configurations = list(configurations or CONFIGURATIONS)
+        self.max_jobs = max(1, max_jobs)
+        self.cpu_budget = cpu_budget or os.cpu_count() or 1
+        self.overlap_targets = overlap_targets
+        # ProjectSetup attributes applied to every job, e.g. {"compiler_cache": "auto"}
+        self.options = options or {}
+        # Used to pick each project's engine from its EngineAssociation when engine_path is None
+        self.engine_registry = None
+        self.queue = []
+        self.active = {}
+        self.results = []
+        # Projects with a finished job, their rules assembly is built
+        self.primed = set()
+        self.concurrent = False
+        self.started = 0
+        self.running = False
+        self.aborted = False
+
+    def jobs(self):
+        return [(project, target, configuration) for project in self.projects for target in self.targets
+                for configuration in self.configurations]
+
+    def start(self):
+        self.started = time.monotonic()
+        self.running = True
+        self.aborted = False
+        self.queue = []
+        self.results = []
+        self.primed = set()
+        for project, target, configuration in self.jobs():
+            if has_target(project, target):
+                self.queue.append((project, target, configuration))
+            else:
+                self.add_result(project, target, configuration, "n/a",
+                                error=f"{target_name(project, target)}.Target.cs does not exist")
+        # Whether builds will ever run side by side, a single project without overlap_targets never does
+        self.concurrent = min(self.max_jobs, len({self.job_key(job[0], job[1]) for job in self.queue})) > 1
+        self.schedule()
+
+    def job_key(self, project, target, primed=True):
+        """intermediate_key of a job, a project's first job with overlap_targets has the project to itself"""
+        return intermediate_key(project, target, self.overlap_targets and primed)
+
+    def concurrent_jobs(self, jobs):
+        """How many of jobs can run at the same time"""
+        keys = {self.job_key(project, target, project in self.primed) for project, target, _ in jobs}
+        return max(1, min(self.max_jobs, len(keys)))
+
+    def parallel_actions(self):
+        """Each job's share of the cores, limited by the memory the machine has left"""
+        slots = self.concurrent_jobs(self.queue + list(self.active))
+        return max(1, choose_parallel_actions(self.cpu_budget, memory_info()["available"]) // slots)
+
+    def schedule(self):
+        busy = {key for _, key in self.active.values()}
+        building = {project for project, _, _ in self.active}
+        for job in list(self.queue):
+            if len(self.active) >= self.max_jobs:
+                break
+            key = self.job_key(job[0], job[1])
+            if key in busy or (job[0] in building and job[0] not in self.primed):
+                continue
+            self.queue.remove(job)
+            busy.add(key)
+            building.add(job[0])
+            self.start_job(job, key)
+        if not self.queue and not self.active:
+            self.finish()
+
+    def start_job(self, job, key):
+        project, target, configuration = job
+        name = job_name(*job)
+        engine_path = project_engine_root(project, self.engine_path, self.engine_registry)
+        setup = ProjectSetup(project, engine_path, self)
+        for option, value in self.options.items():
+            setattr(setup, option, value)
+        setup.build_target = target
+        setup.build_configuration = configuration
+        # UnrealBuildTool allows one instance per engine unless told otherwise
+        setup.build_arguments = []
+        if self.concurrent:
+            log_path = ubt_log_path(project, target, configuration)
+            os.makedirs(os.path.dirname(log_path), exist_ok=True)
+            setup.build_arguments = ["-NoMutex", f"-Log={log_path}"]
+        setup.max_parallel_actions = self.options.get("max_parallel_actions") or self.parallel_actions()
+        # Plugin binaries are restored into and stored from the shared plugin directories
+        setup.use_binary_cache = False
+        setup.clear_cache = False
+        setup.record_history = False
+        setup.log.connect(lambda message, error, name=name: self.job_output.emit(name, message.splitlines(), error))
+        setup.output.connect(lambda lines, error, name=name: self.job_output.emit(name, lines, error))
+        setup.finished.connect(lambda success, job=job, setup=setup: self.job_done(job, setup))
+        self.active[job] = (setup, key)
+        self.job_started.emit(name)
+        setup.run(["compile"], skip_valid=False)
+
+    def job_done(self, job, setup):
+        if job not in self.active:
+            return
+        del self.active[job]
+        self.primed.add(job[0])
+        summary = setup.summary()
+        status = "cancelled" if setup.cancelled else summary["status"]
+        self.add_result(*job, status, summary["seconds"], summary["error"],
+                        setup.step_results.get("compile", {}).get("note"))
+        if setup.process.state() != QProcess.NotRunning:
+            # A cancelled build was killed but not reaped yet
+            setup.process.finished.connect(setup.deleteLater)
+        else:
+            setup.deleteLater()
+        if not self.aborted:
+            # Let the finished signal unwind before starting more work
+            QTimer.singleShot(0, self.schedule)
+        elif not self.active:
+            self.finish()
+
+    def add_result(self, project, target, configuration, status, seconds=0, error=None, note=None):
+        result = {"project": project, "target": target, "configuration": configuration, "status": status,
+                  "seconds": seconds, "error": error, "note": note}
+        self.results.append(result)
+        self.job_finished.emit(job_name(project, target, configuration), result)
+
+    def abort(self):
+        self.aborted = True
+        for project, target, configuration in self.queue:
+            self.add_result(project, target, configuration, "cancelled")
+        self.queue = []
+        for setup, _ in list(self.active.values()):
+            setup.abort()
+        if not self.active:
+            self.finish()
+
+    def finish(self):
+        # A job failing as it starts can make two scheduling passes see the matrix done
+        if self.running:
+            self.running = False
+            self.finished.emit(self.results)
+
+    def summary(self):
+        failed = sum(1 for result in self.results if result["status"] not in ("success", "n/a"))
+        return {
+            "engine": self.engine_path,
+            "targets": self.targets,
+            "configurations": self.configurations,
+            "max_jobs": self.max_jobs,
+            "overlap_targets": self.overlap_targets,
+            "cpu_budget": self.cpu_budget,
+            "seconds": round(time.monotonic() - self.started, 3),
+            "succeeded": sum(1 for result in self.results if result["status"] == "success"),
+            "failed": failed,
+            "jobs": self.results
+        }
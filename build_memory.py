@@ -0,0 +1,45 @@
+import os
+import re
+
+# A UE C++ compile with unity files easily takes 1.5 GB, linking the editor modules more
+DEFAULT_MEMORY_PER_ACTION = 1536 * 1024 ** 2
+# Kept free for the desktop, the editor and the page cache
+RESERVED_MEMORY = 2 * 1024 ** 3
+MAX_BUILD_ATTEMPTS = 3
+# What compilers, linkers and UBT print when the kernel or the allocator gives up
+MEMORY_ERROR_RE = re.compile(r"unable to execute command: Killed|Killed signal terminated program|"
+                             r"virtual memory exhausted|out of memory|std::bad_alloc|"
+                             r"OutOfMemoryException|cannot allocate memory", re.IGNORECASE)
+# Diagnostics of compilers and linkers, a build that printed one failed for a reason of its own
+COMPILE_ERROR_RE = re.compile(r"\berror( [A-Z]+\d+)?:")
+
+def memory_per_action():
+    value = os.environ.get("ROSUE_MEMORY_PER_ACTION_MB")
+    return int(value) * 1024 ** 2 if value else DEFAULT_MEMORY_PER_ACTION
+
+def choose_parallel_actions(cpu_count, available, per_action=None):
+    """Number of UBT actions that fit into the cores and the available memory"""
+    per_action = per_action or memory_per_action()
+    by_memory = max(0, available - RESERVED_MEMORY) // per_action
+    return max(1, min(cpu_count or 1, by_memory))
+
+def has_memory_error(lines):
+    return any(MEMORY_ERROR_RE.search(line) for line in lines)
+
+def has_compile_error(lines):
+    return any(COMPILE_ERROR_RE.search(line) and not MEMORY_ERROR_RE.search(line) for line in lines)
+
+def is_low_memory(available, total):
+    return available < max(512 * 1024 ** 2, total // 32)
+
+def is_memory_failure(killed, output_error, low_memory, compile_error=False):
+    """Whether a failed build most likely ran out of memory
+
+    killed is set when Build.sh died from a signal or exited with 137, which
+    is what the OOM killer's SIGKILL looks like; output_error when the build
+    output contained a memory error and low_memory when the machine had
+    almost no memory available during the build. choose_parallel_actions
+    deliberately fills the memory, so low_memory alone only counts when the
+    build printed no compile_error either.
+    """
+    return killed or output_error or (low_memory and not compile_error)
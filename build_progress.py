@@ -0,0 +1,173 @@
+import os
+import re
+import time
+
+# "[12/345] Compile [x64] Module.MetaLidar.cpp", optionally prefixed by a -Timestamps stamp
+ACTION_RE = re.compile(r"(?:\[[\d:.]+\]\s*)?\[(\d+)/(\d+)\]\s+(\w+)(?:\s+\([^)]*\))?(?:\s+\[[^\]]*\])?\s+(.+?)\s*$")
+# Intermediate files named after their module: unity files, PCHs and generated headers
+UNITY_RE = re.compile(r"^(?:Module|SharedPCH|PCH|Definitions)\.([A-Za-z0-9_]+)\.")
+LIBRARY_RE = re.compile(r"^lib[A-Za-z0-9_]+-([A-Za-z0-9_]+)\.(?:so|a)$")
+GENERATED_RE = re.compile(r"^([A-Za-z0-9_]+)\.init\.gen\.cpp$")
+
+class SourceIndex:
+    """Map source files to their module and modules to the plugin (or game) owning them
+
+    Built from the *.Build.cs files under the project's Source/ and each
+    Plugins/*/Source/ directory.
+    """
+
+    def __init__(self, project_dir=None):
+        self.file_modules = {}
+        self.module_owners = {}
+        if project_dir:
+            self.add_source_dir(os.path.join(project_dir, "Source"), "Game")
+            plugins_dir = os.path.join(project_dir, "Plugins")
+            if os.path.isdir(plugins_dir):
+                for name in sorted(os.listdir(plugins_dir)):
+                    self.add_source_dir(os.path.join(plugins_dir, name, "Source"), name)
+
+    def add_source_dir(self, source_dir, owner):
+        for root, dirs, files in os.walk(source_dir):
+            build_files = [name for name in files if name.endswith(".Build.cs")]
+            if not build_files:
+                continue
+            module = build_files[0][:-len(".Build.cs")]
+            self.module_owners[module] = owner
+            for _, _, module_files in os.walk(root):
+                for name in module_files:
+                    self.file_modules.setdefault(name, module)
+            # Nested modules are rare, the outer one claims all files
+            dirs[:] = []
+
+    def module_of(self, target):
+        name = os.path.basename(target)
+        for pattern in (UNITY_RE, LIBRARY_RE, GENERATED_RE):
+            match = pattern.match(name)
+            if match:
+                return match.group(1)
+        return self.file_modules.get(name)
+
+    def owner_of(self, module):
+        if module is None:
+            return "Other"
+        return self.module_owners.get(module, "Engine")
+
+class UBTProgressParser:
+    """Follow UnrealBuildTool's [done/total] action counters in the build output
+
+    UBT prints an action when it completes, so the time since the previous
+    completion is attributed to it. With parallel actions this measures each
+    file's share of the wall-clock time rather than its own compile time.
+    """
+
+    def __init__(self, source_index=None, clock=time.monotonic):
+        self.source_index = source_index or SourceIndex()
+        self.clock = clock
+        self.started = clock()
+        self.first_action = None
+        self.last_action = self.started
+        # Counters restart when UBT runs another batch of actions
+        self.offset = 0
+        self.done = 0
+        self.total = 0
+        self.file_times = {}
+        self.module_times = {}
+
+    def feed(self, lines):
+        """Parse a batch of output lines, returns True if the progress changed"""
+        changed = False
+        for line in lines:
+            if "[" not in line:
+                continue
+            match = ACTION_RE.match(line)
+            if match:
+                self.add_action(int(match.group(1)), int(match.group(2)), match.group(3), match.group(4))
+                changed = True
+        return changed
+
+    def add_action(self, done, total, verb, target):
+        now = self.clock()
+        if self.first_action is None:
+            self.first_action = now
+        if total != self.total or done < self.done:
+            self.offset += self.done
+            self.total = total
+        self.done = done
+
+        elapsed = now - self.last_action
+        self.last_action = now
+        key = f"{verb} {target}"
+        self.file_times[key] = self.file_times.get(key, 0) + elapsed
+        module = self.source_index.module_of(target)
+        owner = self.source_index.owner_of(module)
+        module_key = (owner, module or "-")
+        seconds, actions = self.module_times.get(module_key, (0, 0))
+        self.module_times[module_key] = (seconds + elapsed, actions + 1)
+
+    @property
+    def percent(self):
+        if not self.total:
+            return 0
+        return 100 * (self.offset + self.done) // (self.offset + self.total)
+
+    def eta(self):
+        """Estimated seconds left, None until there is enough to go on"""
+        if self.first_action is None or self.done < 2 or not self.total:
+            return None
+        rate = (self.last_action - self.first_action) / (self.done - 1)
+        return max(0.0, rate * (self.total - self.done) - (self.clock() - self.last_action))
+
+    def owner_times(self):
+        owners = {}
+        for (owner, _), (seconds, actions) in self.module_times.items():
+            total_seconds, total_actions = owners.get(owner, (0, 0))
+            owners[owner] = (total_seconds + seconds, total_actions + actions)
+        return sorted(owners.items(), key=lambda item: -item[1][0])
+
+    def verb_times(self):
+        """Wall-clock seconds attributed to each kind of action, e.g. Compile and Link"""
+        verbs = {}
+        for key, seconds in self.file_times.items():
+            verb = key.split(" ", 1)[0]
+            verbs[verb] = verbs.get(verb, 0) + seconds
+        return verbs
+
+    def report(self, limit=10):
+        """Log lines with the slowest owners, modules and files of the build"""
+        if not self.module_times:
+            return []
+        lines = [f"Build time by owner ({self.offset + self.done} actions):"]
+        for owner, (seconds, actions) in self.owner_times():
+            lines.append(f"  {seconds:8.1f}s  {actions:5d} actions  {owner}")
+        lines.append("Slowest modules:")
+        modules = sorted(self.module_times.items(), key=lambda item: -item[1][0])
+        for (owner, module), (seconds, actions) in modules[:limit]:
+            lines.append(f"  {seconds:8.1f}s  {actions:5d} actions  {module} ({owner})")
+        lines.append("Slowest actions:")
+        for key, seconds in sorted(self.file_times.items(), key=lambda item: -item[1])[:limit]:
+            lines.append(f"  {seconds:8.1f}s  {key}")
+        return lines
+
+    def summary(self, limit=20):
+        return {
+            "actions": self.offset + self.done,
+            "seconds": round(self.last_action - self.started, 3),
+            "owners": {owner: round(seconds, 3) for owner, (seconds, _) in self.owner_times()},
+            "modules": [
+                {"owner": owner, "module": module, "seconds": round(seconds, 3), "actions": actions}
+                for (owner, module), (seconds, actions)
+                in sorted(self.module_times.items(), key=lambda item: -item[1][0])[:limit]
+            ],
+            "slowest_actions": [
+                {"action": key, "seconds": round(seconds, 3)}
+                for key, seconds in sorted(self.file_times.items(), key=lambda item: -item[1])[:limit]
+            ]
+        }
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds}s"
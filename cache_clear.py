@@ -0,0 +1,119 @@
+import os
+import time
+import shutil
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5.QtCore import QObject, pyqtSignal
+
+# Cache directories at the project root and in every plugin
+PROJECT_CACHE_DIRS = ["Binaries", "Intermediate", "Saved", "DerivedDataCache"]
+PLUGIN_CACHE_DIRS = ["Binaries", "Intermediate"]
+# Renamed targets wait here for deletion, on the same filesystem as the project
+TRASH_DIR = ".rosue-trash"
+SCOPES = ["all", "game", "plugins"]
+
+_counter = itertools.count()
+
+def cache_targets(project_dir, scope="all", plugins=None):
+    """Cache directories to clear for a scope
+
+    "game" only looks at the project root, "plugins" at Plugins/<name> for the
+    given plugin names (all plugins if none are given) and "all" at both.
+    """
+    if scope not in SCOPES:
+        raise ValueError(f"Unknown cache scope: {scope}")
+    targets = []
+    if scope in ("all", "game"):
+        targets += [os.path.join(project_dir, name) for name in PROJECT_CACHE_DIRS]
+    if scope in ("all", "plugins"):
+        plugins_dir = os.path.join(project_dir, "Plugins")
+        names = plugins if scope == "plugins" and plugins else (
+            sorted(os.listdir(plugins_dir)) if os.path.isdir(plugins_dir) else [])
+        for name in names:
+            targets += [os.path.join(plugins_dir, name, cache) for cache in PLUGIN_CACHE_DIRS]
+    return [path for path in targets if os.path.isdir(path) and not os.path.islink(path)]
+
+def move_aside(project_dir, targets):
+    """Atomically rename targets into the trash so they disappear from the build at once
+
+    Returns the renamed paths, including leftovers of earlier interrupted clears.
+    """
+    trash_dir = os.path.join(project_dir, TRASH_DIR)
+    os.makedirs(trash_dir, exist_ok=True)
+    trashed = [os.path.join(trash_dir, name) for name in os.listdir(trash_dir)]
+    for path in targets:
+        label = os.path.relpath(path, project_dir).replace(os.sep, "-")
+        destination = os.path.join(trash_dir, f"{label}-{os.getpid()}-{next(_counter)}")
+        try:
+            os.rename(path, destination)
+        except OSError:
+            # A plugin symlinked from another filesystem cannot be renamed into the trash
+            destination = f"{path}.rosue-trash-{os.getpid()}-{next(_counter)}"
+            os.rename(path, destination)
+        trashed.append(destination)
+    return trashed
+
+def delete_tree(path):
+    """Delete a directory tree and return the number of bytes it occupied"""
+    reclaimed = 0
+    for root, dirs, files in os.walk(path, topdown=False):
+        for name in files:
+            file_path = os.path.join(root, name)
+            try:
+                reclaimed += os.lstat(file_path).st_size
+                os.unlink(file_path)
+            except OSError:
+                pass
+        for name in dirs:
+            dir_path = os.path.join(root, name)
+            try:
+                if os.path.islink(dir_path):
+                    os.unlink(dir_path)
+                else:
+                    os.rmdir(dir_path)
+            except OSError:
+                pass
+    shutil.rmtree(path, ignore_errors=True)
+    return reclaimed
+
+class BackgroundDeleter(QObject):
+    """Delete directory trees on worker threads and report the bytes reclaimed"""
+    finished = pyqtSignal(object, int, float)
+
+    def __init__(self, max_workers=None, parent=None):
+        super().__init__(parent)
+        self.max_workers = max_workers or min(8, os.cpu_count() or 1)
+
+    def delete(self, paths):
+        # The signal is queued to the receivers' thread, so slots run on the event loop.
+        # Anything left when the process exits stays in the trash for the next clear.
+        thread = threading.Thread(target=self.run, args=(list(paths),), daemon=True)
+        thread.start()
+        return thread
+
+    def run(self, paths):
+        started = time.monotonic()
+        # Split every tree at its top level so one huge directory does not serialize the work
+        parts = []
+        for path in paths:
+            try:
+                parts += [entry.path for entry in os.scandir(path)]
+            except OSError:
+                pass
+        with ThreadPoolExecutor(self.max_workers) as executor:
+            reclaimed = sum(executor.map(self.delete_part, parts))
+        for path in paths:
+            reclaimed += delete_tree(path)
+        self.finished.emit(reclaimed, len(paths), time.monotonic() - started)
+
+    @staticmethod
+    def delete_part(path):
+        try:
+            if os.path.isdir(path) and not os.path.islink(path):
+                return delete_tree(path)
+            size = os.lstat(path).st_size
+            os.unlink(path)
+            return size
+        except OSError:
+            return 0
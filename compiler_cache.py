@@ -0,0 +1,172 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import subprocess
+
+TOOLS = ["ccache", "sccache"]
+WRAPPED_COMPILERS = ["clang", "clang++"]
+TARGET_TRIPLE = "x86_64-unknown-linux-gnu"
+# Where engines ship their clang, UBT uses it unless LINUX_MULTIARCH_ROOT points elsewhere
+ENGINE_SDK_DIR = os.path.join("Engine", "Extras", "ThirdPartyNotUE", "SDKs", "HostLinux", "Linux_x64")
+MISS_TIME_FILE = "rosue-miss-seconds"
+
+def default_cache_dir():
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.environ.get("ROSUE_COMPILER_CACHE_DIR") or os.path.join(cache_home, "rosue", "compiler-cache")
+
+def find_tool(name=None):
+    """Path of the requested compiler cache, or of the first one installed when name is None"""
+    for tool in [name] if name else TOOLS:
+        path = shutil.which(tool)
+        if path:
+            return path
+    return None
+
+def tool_kind(tool_path):
+    return "sccache" if "sccache" in os.path.basename(tool_path) else "ccache"
+
+def engine_toolchain(engine_path):
+    """Root of the clang toolchain UBT will use for the engine, None if there is none"""
+    candidates = []
+    if os.environ.get("LINUX_MULTIARCH_ROOT"):
+        candidates.append(os.environ["LINUX_MULTIARCH_ROOT"])
+    sdk_dir = os.path.join(engine_path, ENGINE_SDK_DIR)
+    if os.path.isdir(sdk_dir):
+        candidates += [os.path.join(sdk_dir, name) for name in sorted(os.listdir(sdk_dir), reverse=True)]
+    for root in candidates:
+        if os.path.exists(os.path.join(root, TARGET_TRIPLE, "bin", "clang++")):
+            return root
+    return None
+
+def toolchain_layout(toolchain_root, tool_path):
+    """What a wrapper toolchain is made of, it only has to be rebuilt when this changes"""
+    triple_dir = os.path.join(toolchain_root, TARGET_TRIPLE)
+    bin_dir = os.path.join(triple_dir, "bin")
+    return {
+        "toolchain": toolchain_root,
+        "tool": tool_path,
+        "root": sorted(os.listdir(toolchain_root)),
+        "triple": sorted(os.listdir(triple_dir)),
+        "bin": sorted(os.listdir(bin_dir)),
+        "compilers": [os.path.realpath(os.path.join(bin_dir, name)) for name in WRAPPED_COMPILERS]
+    }
+
+def make_wrapper_toolchain(toolchain_root, tool_path, cache_dir):
+    """Mirror the toolchain with symlinks, except for clang and clang++ which go through the cache
+
+    UBT calls the compiler by its path below LINUX_MULTIARCH_ROOT, pointing
+    that variable at the mirror is enough to route every compile through the
+    cache. The real compilers keep being executed from their own location so
+    they still find their headers and libraries.
+
+    Concurrent builds share the mirror while their compiles run through it, so
+    an existing one is never modified. The directory is named after the
+    toolchain's layout, built next to it and renamed into place, and whoever
+    renames first wins.
+    """
+    layout = toolchain_layout(toolchain_root, tool_path)
+    digest = hashlib.sha1(json.dumps(layout, sort_keys=True).encode()).hexdigest()[:10]
+    toolchains_dir = os.path.join(cache_dir, "toolchains")
+    wrapper_root = os.path.join(toolchains_dir, digest)
+    if os.path.isdir(wrapper_root):
+        return wrapper_root
+    os.makedirs(toolchains_dir, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=f".{digest}.", dir=toolchains_dir)
+    try:
+        for name in layout["root"]:
+            if name != TARGET_TRIPLE:
+                os.symlink(os.path.join(toolchain_root, name), os.path.join(staging, name))
+        triple_dir = os.path.join(toolchain_root, TARGET_TRIPLE)
+        for name in layout["triple"]:
+            if name != "bin":
+                os.makedirs(os.path.join(staging, TARGET_TRIPLE), exist_ok=True)
+                os.symlink(os.path.join(triple_dir, name), os.path.join(staging, TARGET_TRIPLE, name))
+        bin_dir = os.path.join(triple_dir, "bin")
+        wrapper_bin = os.path.join(staging, TARGET_TRIPLE, "bin")
+        os.makedirs(wrapper_bin, exist_ok=True)
+        for name in layout["bin"]:
+            target = os.path.join(wrapper_bin, name)
+            if name in WRAPPED_COMPILERS:
+                with open(target, 'w') as f:
+                    f.write(f'#!/bin/sh\nexec "{tool_path}" "{os.path.realpath(os.path.join(bin_dir, name))}" "$@"\n')
+                os.chmod(target, 0o755)
+            else:
+                os.symlink(os.path.join(bin_dir, name), target)
+        # mkdtemp directories are private, the mirror is not
+        os.chmod(staging, 0o755)
+        try:
+            os.rename(staging, wrapper_root)
+        except OSError:
+            # Another build put an identical mirror in place first
+            if not os.path.isdir(wrapper_root):
+                raise
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return wrapper_root
+
+def cache_environment(tool_path, cache_dir, base_dir):
+    """Environment variables that point the compiler cache at cache_dir"""
+    if tool_kind(tool_path) == "sccache":
+        return {"SCCACHE_DIR": os.path.join(cache_dir, "sccache")}
+    return {
+        "CCACHE_DIR": os.path.join(cache_dir, "ccache"),
+        # Paths below the project are hashed relative to it, so other checkouts of the same plugins hit
+        "CCACHE_BASEDIR": base_dir,
+        "CCACHE_NOHASHDIR": "1",
+        # UBT's precompiled headers are only cacheable with these
+        "CCACHE_SLOPPINESS": "pch_defines,time_macros,include_file_mtime,include_file_ctime"
+    }
+
+def read_stats(tool_path, env):
+    """Cumulative hits and misses of the cache, None if the tool cannot report them"""
+    environment = dict(os.environ, **env)
+    if tool_kind(tool_path) == "sccache":
+        result = subprocess.run([tool_path, "--show-stats", "--stats-format=json"],
+                                capture_output=True, text=True, env=environment)
+        try:
+            stats = json.loads(result.stdout)["stats"]
+            return {"hits": sum(stats["cache_hits"]["counts"].values()),
+                    "misses": sum(stats["cache_misses"]["counts"].values())}
+        except (ValueError, KeyError, TypeError):
+            return None
+    result = subprocess.run([tool_path, "--print-stats"], capture_output=True, text=True, env=environment)
+    if result.returncode != 0:
+        return None
+    values = {}
+    for line in result.stdout.splitlines():
+        name, _, value = line.partition("\t")
+        if value.strip().isdigit():
+            values[name] = int(value)
+    return {"hits": values.get("direct_cache_hit", 0) + values.get("preprocessed_cache_hit", 0),
+            "misses": values.get("cache_miss", 0)}
+
+def stats_difference(before, after):
+    if not before or not after:
+        return None
+    return {key: max(0, after[key] - before[key]) for key in ("hits", "misses")}
+
+def estimate_saved(stats, compile_seconds, cache_dir):
+    """Estimated seconds the cache hits saved
+
+    With hits costing next to nothing, the build's compile time divided by
+    its misses is what a miss costs. Builds without misses use the cost
+    measured by the last build that had some.
+    """
+    path = os.path.join(cache_dir, MISS_TIME_FILE)
+    if stats["misses"]:
+        miss_seconds = compile_seconds / stats["misses"]
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(str(miss_seconds))
+        except OSError:
+            pass
+    else:
+        try:
+            with open(path, 'r') as f:
+                miss_seconds = float(f.read())
+        except (OSError, ValueError):
+            return None
+    return stats["hits"] * miss_seconds
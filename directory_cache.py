@@ -0,0 +1,106 @@
+import os
+import time
+import shutil
+
+LAST_USED_MARKER = "rosue-last-used"
+
+def format_size(size):
+    for unit in ["B", "KB", "MB"]:
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+def directory_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+class DirectoryCache:
+    """A directory of cache entries, one subdirectory each, evicted least recently used first
+
+    Subclasses describe their entries with entry_info and give the size limit
+    used when evict is called without one in default_max_size.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def default_max_size(self):
+        raise NotImplementedError
+
+    def entry_info(self, name, path):
+        """Details of the entry at path to list along with it, None if path is not an entry"""
+        raise NotImplementedError
+
+    def touch_entry(self, path):
+        if os.path.isdir(path):
+            with open(os.path.join(path, LAST_USED_MARKER), "w") as f:
+                f.write(str(time.time()))
+
+    def entries(self):
+        """List cached entries, least recently used first"""
+        if not os.path.isdir(self.root):
+            return []
+        entries = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            info = self.entry_info(name, path)
+            if info is None:
+                continue
+            marker = os.path.join(path, LAST_USED_MARKER)
+            entries.append(dict(info, path=path, size=directory_size(path),
+                                last_used=os.path.getmtime(marker if os.path.exists(marker) else path)))
+        entries.sort(key=lambda entry: entry["last_used"])
+        return entries
+
+    def total_size(self):
+        return sum(entry["size"] for entry in self.entries())
+
+    def evict_paths(self, max_size=None, keep_paths=()):
+        """Remove least recently used entries until the cache fits into max_size
+
+        Entries at keep_paths are never removed. Returns the removed entries.
+        """
+        max_size = self.default_max_size() if max_size is None else max_size
+        entries = self.entries()
+        total = sum(entry["size"] for entry in entries)
+        removed = []
+        for entry in entries:
+            if total <= max_size:
+                break
+            if entry["path"] in keep_paths:
+                continue
+            shutil.rmtree(entry["path"], ignore_errors=True)
+            total -= entry["size"]
+            removed.append(entry)
+        return removed
+
+    def clear(self):
+        return self.evict_paths(0)
+
+def cache_main(cache, argv, script, noun, describe):
+    """info, evict and clear commands of a cache's command line, describe(entry) names a listed entry"""
+    command = argv[0] if argv else "info"
+    if command == "info":
+        entries = cache.entries()
+        for entry in entries:
+            last_used = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["last_used"]))
+            print(f"{format_size(entry['size']):>10}  {last_used}  {describe(entry)}")
+        print(f"{len(entries)} {noun}, {format_size(sum(e['size'] for e in entries))} in {cache.root}")
+    elif command == "evict":
+        max_size = int(argv[1]) * 1024 ** 2 if len(argv) > 1 else None
+        removed = cache.evict_paths(max_size)
+        print(f"Removed {len(removed)} {noun}, freed {format_size(sum(e['size'] for e in removed))}")
+    elif command == "clear":
+        removed = cache.clear()
+        print(f"Removed {len(removed)} {noun}, freed {format_size(sum(e['size'] for e in removed))}")
+    else:
+        print(f"Usage: {script} [info | evict [MAX_MB] | clear]")
+        return 1
+    return 0
@@ -0,0 +1,246 @@
+import os
+import json
+import threading
+import configparser
+from PyQt5.QtCore import QObject, pyqtSignal
+from uproject import load_uproject
+
+BUILD_SCRIPT = os.path.join("Engine", "Build", "BatchFiles", "Linux", "Build.sh")
+BUILD_VERSION = os.path.join("Engine", "Build", "Build.version")
+INSTALL_INI = os.path.expanduser("~/.config/Epic/UnrealEngine/Install.ini")
+# Usual install locations, checked directly
+KNOWN_ROOTS = [
+    "/opt/UnrealEngine",
+    "/opt/unreal-engine",
+    os.path.expanduser("~/UnrealEngine"),
+    "/opt/UE5",
+    "/opt/UnrealEngine5"
+]
+# Directories whose immediate children may be engine roots, e.g. /opt/UnrealEngine-5.3
+SEARCH_PREFIXES = ["/opt", os.path.expanduser("~"), os.path.expanduser("~/Epic"), "/usr/local"]
+CACHE_VERSION = 1
+
+def default_cache_path():
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(cache_home, "rosue", "engines.json")
+
+def search_prefixes():
+    extra = os.environ.get("ROSUE_ENGINE_PREFIXES", "")
+    return SEARCH_PREFIXES + [os.path.expanduser(path) for path in extra.split(os.pathsep) if path]
+
+def is_unreal_engine(path):
+    return os.path.exists(os.path.join(path, BUILD_SCRIPT))
+
+def mtime_stamp(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+def read_install_ini(path=INSTALL_INI):
+    """Engine registrations of the launcher and source builds as {association: root}"""
+    parser = configparser.ConfigParser(strict=False, interpolation=None)
+    # GUIDs are case sensitive keys
+    parser.optionxform = str
+    try:
+        parser.read(path)
+    except configparser.Error:
+        return {}
+    if not parser.has_section("Installations"):
+        return {}
+    return {key: os.path.expanduser(value) for key, value in parser.items("Installations")}
+
+def engine_info(root, association=None, source="scan"):
+    """Describe the engine at root from its Build.version, None if it is not an engine"""
+    root = os.path.realpath(root)
+    if not is_unreal_engine(root):
+        return None
+    try:
+        with open(os.path.join(root, BUILD_VERSION), 'r') as f:
+            build_version = json.load(f)
+    except (OSError, ValueError):
+        build_version = {}
+    major = build_version.get("MajorVersion", 0)
+    minor = build_version.get("MinorVersion", 0)
+    patch = build_version.get("PatchVersion", 0)
+    return {
+        "root": root,
+        "version": f"{major}.{minor}.{patch}" if major else "unknown",
+        "major": major,
+        "minor": minor,
+        "patch": patch,
+        "changelist": build_version.get("Changelist"),
+        "branch": build_version.get("BranchName"),
+        "association": association,
+        "source": source
+    }
+
+def discover_engines(custom_roots=()):
+    """Find every Unreal Engine 5 installation, returns (engines, stamps used to invalidate them)"""
+    stamps = {INSTALL_INI: mtime_stamp(INSTALL_INI)}
+    candidates = []
+    for association, root in read_install_ini().items():
+        candidates.append((root, association, "ini"))
+    for root in custom_roots:
+        candidates.append((root, None, "custom"))
+    for root in KNOWN_ROOTS:
+        stamps[root] = mtime_stamp(root)
+        candidates.append((root, None, "scan"))
+    for prefix in search_prefixes():
+        # The home directory changes all the time, new engines there need a manual rescan
+        if prefix != os.path.expanduser("~"):
+            stamps[prefix] = mtime_stamp(prefix)
+        try:
+            children = sorted(os.scandir(prefix), key=lambda entry: entry.name)
+        except OSError:
+            continue
+        for entry in children:
+            if entry.is_dir() and not entry.name.startswith("."):
+                candidates.append((entry.path, None, "scan"))
+
+    engines = {}
+    for root, association, source in candidates:
+        info = engine_info(root, association, source)
+        if info is None:
+            continue
+        existing = engines.get(info["root"])
+        if existing:
+            # The same install found twice keeps its registration
+            existing["association"] = existing["association"] or association
+            continue
+        engines[info["root"]] = info
+        stamps[os.path.join(info["root"], BUILD_VERSION)] = mtime_stamp(os.path.join(info["root"], BUILD_VERSION))
+    return sorted(engines.values(), key=lambda e: (-e["major"], -e["minor"], -e["patch"], e["root"])), stamps
+
+def project_association(project_path):
+    try:
+        return load_uproject(project_path).read().get("EngineAssociation", "")
+    except (OSError, ValueError, AttributeError):
+        return ""
+
+def match_engine(engines, association):
+    """Pick the installation for an EngineAssociation, a GUID or a "5.3" style version"""
+    if not association:
+        return None
+    for engine in engines:
+        if engine["association"] and engine["association"].lower() == association.lower():
+            return engine
+    parts = association.split(".")
+    if len(parts) >= 2 and all(part.isdigit() for part in parts[:2]):
+        major, minor = int(parts[0]), int(parts[1])
+        matching = [e for e in engines if e["major"] == major and e["minor"] == minor]
+        if matching:
+            return max(matching, key=lambda e: e["patch"])
+    return None
+
+class EngineRegistry(QObject):
+    """Installed Unreal Engines, persisted so later launches do not scan the filesystem
+
+    The cache is reused while Install.ini, the search locations and every
+    engine's Build.version keep their mtime; otherwise refresh_async scans again
+    on a worker thread.
+    """
+    engines_changed = pyqtSignal(object)
+    discovered = pyqtSignal(object, object)
+
+    def __init__(self, cache_path=None, parent=None):
+        super().__init__(parent)
+        self.cache_path = cache_path or default_cache_path()
+        self.engines = []
+        self.custom_roots = []
+        self.scanning = False
+        # Emitted from the worker thread, delivered on the event loop
+        self.discovered.connect(self.set_engines)
+
+    def load_cached(self):
+        """Load the persisted engines, returns False if they have to be rediscovered"""
+        try:
+            with open(self.cache_path, 'r') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return False
+        self.custom_roots = cache.get("custom", [])
+        if cache.get("version") != CACHE_VERSION:
+            return False
+        stamps = cache.get("stamps", {})
+        if any(mtime_stamp(path) != stamp for path, stamp in stamps.items()):
+            return False
+        self.engines = cache.get("engines", [])
+        return True
+
+    def save(self, stamps):
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        with open(self.cache_path + ".tmp", 'w') as f:
+            json.dump({"version": CACHE_VERSION, "custom": self.custom_roots,
+                       "stamps": stamps, "engines": self.engines}, f, indent=4)
+        os.replace(self.cache_path + ".tmp", self.cache_path)
+
+    def discover(self):
+        """Scan synchronously and persist the result"""
+        engines, stamps = discover_engines(self.custom_roots)
+        self.set_engines(engines, stamps)
+        return engines
+
+    def refresh_async(self):
+        if self.scanning:
+            return
+        self.scanning = True
+        custom_roots = list(self.custom_roots)
+        threading.Thread(target=lambda: self.discovered.emit(*discover_engines(custom_roots)),
+                         daemon=True).start()
+
+    def set_engines(self, engines, stamps):
+        self.scanning = False
+        self.engines = engines
+        try:
+            self.save(stamps)
+        except OSError:
+            pass
+        self.engines_changed.emit(engines)
+
+    def add_custom(self, root):
+        """Register an engine picked by hand, returns its description or None if it is not an engine"""
+        info = engine_info(root, source="custom")
+        if info is None:
+            return None
+        if info["root"] not in self.custom_roots:
+            self.custom_roots.append(info["root"])
+        if all(engine["root"] != info["root"] for engine in self.engines):
+            self.engines.append(info)
+        # Rescan so the stamps include the new root
+        self.discover()
+        return info
+
+    def find(self, root):
+        root = os.path.realpath(root)
+        return next((engine for engine in self.engines if engine["root"] == root), None)
+
+    def default_engine(self):
+        """The engine used when a project does not ask for a specific one"""
+        for root in KNOWN_ROOTS:
+            engine = self.find(root) if os.path.exists(root) else None
+            if engine:
+                return engine
+        return self.engines[0] if self.engines else None
+
+    def engine_for_project(self, project_path):
+        """Returns (matching engine or None, the project's EngineAssociation)"""
+        association = project_association(project_path)
+        return match_engine(self.engines, association), association
+
+def project_engine_root(project_path, engine_path=None, registry=None):
+    """Root of the engine to build a project with
+
+    engine_path wins when given, otherwise the registry's engine matching the
+    project's EngineAssociation, or its default engine for projects without
+    one. None when nothing fits.
+    """
+    if engine_path or not registry:
+        return engine_path
+    engine, association = registry.engine_for_project(project_path)
+    if engine is None and not association:
+        engine = registry.default_engine()
+    return engine["root"] if engine else None
+
+def engine_label(engine):
+    return f"UE {engine['version']} — {engine['root']}"
@@ -1,14 +1,166 @@
 import os
 import sys
 import json
-import subprocess
-from pathlib import Path
+import signal
+import argparse
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QLabel, QPushButton,
                              QFileDialog, QGroupBox, QCheckBox, QLineEdit, QMessageBox, QProgressBar,
-                             QTextEdit, QScrollBar)
-from PyQt5.QtCore import Qt, QProcess
+                             QPlainTextEdit, QComboBox, QDialog, QHBoxLayout, QSpinBox, QTabWidget,
+                             QTableWidget, QTableWidgetItem)
+from PyQt5.QtCore import Qt, QCoreApplication, QTimer
+from PyQt5.QtGui import QFontDatabase
+from directory_cache import format_size
+from mirror_cache import MirrorCache
+from binary_cache import default_cache_root as default_binary_cache_root
+from compiler_cache import find_tool as find_compiler_cache, default_cache_dir as default_compiler_cache_dir
+from build_log import LogBuffer, new_log_path
+from build_progress import format_duration
+from setup_core import (ProjectSetup, BatchRunner, CONFIGURATIONS, TARGET_SUFFIXES, check_cpp_support,
+                        remove_plugins, project_name)
+from engine_registry import EngineRegistry, engine_label
+from telemetry import History, format_comparison, write_chrome_trace
+from plugin_lock import export_bundle as export_plugin_bundle, read_lock
+from source_watch import WatchMode
+from build_matrix import (BuildMatrix, format_matrix, CONFIGURATIONS as MATRIX_CONFIGURATIONS,
+                          TARGETS as MATRIX_TARGETS)
+
+class BuildMatrixDialog(QDialog):
+    """Build several targets and configurations of the project, each job with its own log tab"""
+    LOG_MAX_BLOCKS = 5000
+
+    def __init__(self, project_path, engine_path, options, parent=None):
+        super().__init__(parent)
+        self.project_path = project_path
+        self.engine_path = engine_path
+        self.options = options
+        self.matrix = None
+        self.logs = {}
+        self.cells = {}
+        self.setWindowTitle("Build Matrix")
+        self.resize(900, 640)
+        layout = QVBoxLayout(self)
+
+        choices = QHBoxLayout()
+        self.target_cbs = {}
+        for target in TARGET_SUFFIXES:
+            self.target_cbs[target] = QCheckBox(target)
+            self.target_cbs[target].setChecked(target in MATRIX_TARGETS)
+            choices.addWidget(self.target_cbs[target])
+        choices.addSpacing(20)
+        self.configuration_cbs = {}
+        for configuration in CONFIGURATIONS:
+            self.configuration_cbs[configuration] = QCheckBox(configuration)
+            self.configuration_cbs[configuration].setChecked(configuration in MATRIX_CONFIGURATIONS)
+            choices.addWidget(self.configuration_cbs[configuration])
+        choices.addSpacing(20)
+        choices.addWidget(QLabel("Concurrent builds:"))
+        self.jobs_spin = QSpinBox()
+        self.jobs_spin.setRange(1, max(1, os.cpu_count() or 1))
+        self.jobs_spin.setValue(min(2, self.jobs_spin.maximum()))
+        choices.addWidget(self.jobs_spin)
+        self.overlap_cb = QCheckBox("Overlap target types")
+        self.overlap_cb.setToolTip("Build Editor, Game and Server side by side once the first build finished. "
+                                   "They still share the project's rules assembly and build manifest.")
+        choices.addWidget(self.overlap_cb)
+        # The builds of one project run one at a time unless its target types may overlap
+        self.jobs_spin.setToolTip("Builds of different target types run side by side, "
+                                  "only used with Overlap target types")
+        self.jobs_spin.setEnabled(False)
+        self.overlap_cb.toggled.connect(self.jobs_spin.setEnabled)
+        layout.addLayout(choices)
+
+        buttons = QHBoxLayout()
+        self.start_btn = QPushButton("Start")
+        self.start_btn.clicked.connect(self.start)
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.clicked.connect(self.cancel)
+        self.cancel_btn.setEnabled(False)
+        buttons.addWidget(self.start_btn)
+        buttons.addWidget(self.cancel_btn)
+        layout.addLayout(buttons)
+
+        self.table = QTableWidget()
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.table)
+        self.tabs = QTabWidget()
+        layout.addWidget(self.tabs, 1)
+
+    def start(self):
+        targets = [target for target, cb in self.target_cbs.items() if cb.isChecked()]
+        configurations = [configuration for configuration, cb in self.configuration_cbs.items() if cb.isChecked()]
+        if not targets or not configurations:
+            return
+        self.table.clear()
+        self.table.setRowCount(len(targets))
+        self.table.setColumnCount(len(configurations))
+        self.table.setVerticalHeaderLabels(targets)
+        self.table.setHorizontalHeaderLabels(configurations)
+        self.cells = {(target, configuration): (row, column) for row, target in enumerate(targets)
+                      for column, configuration in enumerate(configurations)}
+        for row, column in self.cells.values():
+            self.table.setItem(row, column, QTableWidgetItem("queued"))
+        self.tabs.clear()
+        self.logs = {}
+
+        self.matrix = BuildMatrix([self.project_path], self.engine_path, targets, configurations,
+                                  self.jobs_spin.value() if self.overlap_cb.isChecked() else 1, options=self.options,
+                                  overlap_targets=self.overlap_cb.isChecked(), parent=self)
+        self.matrix.job_started.connect(self.job_started)
+        self.matrix.job_output.connect(self.job_output)
+        self.matrix.job_finished.connect(self.job_finished)
+        self.matrix.finished.connect(self.matrix_finished)
+        self.start_btn.setEnabled(False)
+        self.cancel_btn.setEnabled(True)
+        self.matrix.start()
+
+    def cell(self, name):
+        _, target, configuration = name.rsplit(" ", 2)
+        row, column = self.cells[(target, configuration)]
+        return self.table.item(row, column)
+
+    def job_started(self, name):
+        self.cell(name).setText("building")
+        log = QPlainTextEdit()
+        log.setReadOnly(True)
+        log.setMaximumBlockCount(self.LOG_MAX_BLOCKS)
+        log.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.logs[name] = log
+        self.tabs.addTab(log, name.split(" ", 1)[1])
+
+    def job_output(self, name, lines, error):
+        if name in self.logs:
+            self.logs[name].appendPlainText("\n".join(f"[ERROR] {line}" if error else line for line in lines))
+
+    def job_finished(self, name, result):
+        if result["status"] in ("success", "failed"):
+            text = f"{'PASS' if result['status'] == 'success' else 'FAIL'} {result['seconds']:.1f}s"
+        else:
+            text = result["status"]
+        item = self.cell(name)
+        item.setText(text)
+        item.setToolTip(result["error"] or result["note"] or "")
+        if result["status"] == "failed":
+            item.setForeground(Qt.red)
+
+    def matrix_finished(self, results):
+        self.start_btn.setEnabled(True)
+        self.cancel_btn.setEnabled(False)
+        summary = self.matrix.summary()
+        self.setWindowTitle(f"Build Matrix: {summary['succeeded']} passed, {summary['failed']} failed "
+                            f"in {summary['seconds']:.0f}s")
+
+    def cancel(self):
+        if self.matrix and self.matrix.running:
+            self.matrix.abort()
+
+    def reject(self):
+        self.cancel()
+        super().reject()
 
 class ROSUESetupGUI(QMainWindow):
+    LOG_MAX_BLOCKS = 5000
+    LOG_FLUSH_INTERVAL = 100
+
     def __init__(self):
         super().__init__()
         # Add completion states
@@ -29,12 +181,17 @@ class ROSUESetupGUI(QMainWindow):
         self.engine_group = QGroupBox("Step 1: Unreal Engine 5 Detection")
         self.engine_layout = QVBoxLayout()
         self.engine_status = QLabel("Searching for Unreal Engine 5...")
-        self.engine_path_edit = QLineEdit()
-        self.engine_path_edit.setReadOnly(True)
+        # Every discovered installation, the project's EngineAssociation picks the default
+        self.engine_combo = QComboBox()
+        self.engine_combo.setEnabled(False)
+        self.engine_combo.currentIndexChanged.connect(self.engine_selected)
         self.browse_engine_btn = QPushButton("Browse Manually")
         self.browse_engine_btn.clicked.connect(self.browse_engine)
+        self.rescan_engines_btn = QPushButton("Rescan Installations")
+        self.rescan_engines_btn.clicked.connect(self.rescan_engines)
         self.engine_layout.addWidget(self.engine_status)
-        self.engine_layout.addWidget(self.engine_path_edit)
+        self.engine_layout.addWidget(self.engine_combo)
+        self.engine_layout.addWidget(self.rescan_engines_btn)
         self.engine_layout.addWidget(self.browse_engine_btn)
         self.engine_group.setLayout(self.engine_layout)
         
@@ -61,14 +218,27 @@ class ROSUESetupGUI(QMainWindow):
         # Add Log Section
         self.log_group = QGroupBox("Installation Log")
         self.log_layout = QVBoxLayout()
-        self.log_text = QTextEdit()
+        self.log_text = QPlainTextEdit()
         self.log_text.setReadOnly(True)
         self.log_text.setMinimumHeight(200)
+        # Only the newest lines stay in the widget, the full log is spilled to disk
+        self.log_text.setMaximumBlockCount(self.LOG_MAX_BLOCKS)
         self.log_layout.addWidget(self.log_text)
+        self.log_buffer = LogBuffer(spill_path=new_log_path())
+        # Lines are shown in batches instead of one widget update per line
+        self.log_flush_timer = QTimer(self)
+        self.log_flush_timer.setInterval(self.LOG_FLUSH_INTERVAL)
+        self.log_flush_timer.timeout.connect(self.flush_log)
         self.log_group.setLayout(self.log_layout)
 
         # Progress Section with separate buttons
         self.progress_bar = QProgressBar()
+        # One bar per plugin git job, shown only while plugins are being installed
+        self.plugin_progress_layout = QVBoxLayout()
+        self.plugin_progress_bars = {}
+        # Core engine for the selected project, see create_project_setup
+        self.setup = None
+        self.running_all = False
         self.button_layout = QVBoxLayout()
         
         # Add remove plugins button
@@ -83,6 +253,12 @@ class ROSUESetupGUI(QMainWindow):
         self.compile_btn = QPushButton("3. Compile Project")
         self.compile_btn.clicked.connect(lambda: self.start_step("compile"))
         
+        self.run_all_btn = QPushButton("Run All Steps")
+        self.run_all_btn.clicked.connect(self.start_installation)
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.clicked.connect(self.cancel)
+        self.cancel_btn.setEnabled(False)
+        
         self.steps_buttons = {
             "plugins": self.install_plugins_btn,
             "update": self.update_project_btn,
@@ -93,10 +269,71 @@ class ROSUESetupGUI(QMainWindow):
         self.clear_cache_cb = QCheckBox("Clear cache before compilation (recommended for clean rebuild)")
         self.clear_cache_cb.setChecked(False)
         self.button_layout.addWidget(self.clear_cache_cb)
-        
-        for btn in [self.install_plugins_btn, self.update_project_btn, self.compile_btn]:
+        # Scope of the cache clear, filled with the project's plugins in update_cache_scopes
+        self.cache_scope_combo = QComboBox()
+        self.cache_scope_combo.setEnabled(False)
+        self.clear_cache_cb.toggled.connect(self.cache_scope_combo.setEnabled)
+        self.update_cache_scopes()
+        self.button_layout.addWidget(self.cache_scope_combo)
+
+        # Add force rebuild checkbox
+        self.force_build_cb = QCheckBox("Force rebuild even if nothing changed since the last build")
+        self.force_build_cb.setChecked(False)
+        self.button_layout.addWidget(self.force_build_cb)
+
+        # Add shared mirror cache checkbox
+        self.mirror_cache = MirrorCache()
+        self.mirror_cache_cb = QCheckBox(f"Clone plugins through the shared mirror cache ({self.mirror_cache.root})")
+        self.mirror_cache_cb.setChecked(True)
+        self.button_layout.addWidget(self.mirror_cache_cb)
+
+        # Add prebuilt plugin binaries checkbox
+        self.binary_cache_cb = QCheckBox(f"Reuse plugin binaries built by other projects ({default_binary_cache_root()})")
+        self.binary_cache_cb.setChecked(True)
+        self.button_layout.addWidget(self.binary_cache_cb)
+
+        # Add compiler cache checkbox, only available when ccache or sccache is installed
+        compiler_cache = find_compiler_cache()
+        self.compiler_cache_cb = QCheckBox(
+            f"Compile through {os.path.basename(compiler_cache)} ({default_compiler_cache_dir()})" if compiler_cache
+            else "Compile through a compiler cache (install ccache or sccache to enable)")
+        self.compiler_cache_cb.setChecked(False)
+        self.compiler_cache_cb.setEnabled(bool(compiler_cache))
+        self.button_layout.addWidget(self.compiler_cache_cb)
+        
+        # Add watch mode checkbox, rebuilds whenever the project's or its plugins' sources change
+        self.watch_mode = None
+        self.watch_cb = QCheckBox("Watch sources and rebuild after every change")
+        self.watch_cb.setChecked(False)
+        self.watch_cb.setEnabled(False)
+        self.watch_cb.toggled.connect(self.toggle_watch_mode)
+        self.button_layout.addWidget(self.watch_cb)
+
+        for btn in [self.install_plugins_btn, self.update_project_btn, self.compile_btn, self.run_all_btn]:
             btn.setEnabled(False)
             self.button_layout.addWidget(btn)
+        self.button_layout.addWidget(self.cancel_btn)
+
+        # Add offline plugin buttons, they use the commits pinned in the project's lockfile
+        self.install_bundle_btn = QPushButton("Install Plugins from Bundle...")
+        self.install_bundle_btn.clicked.connect(self.install_from_bundle)
+        self.install_bundle_btn.setEnabled(False)
+        self.button_layout.addWidget(self.install_bundle_btn)
+        self.export_bundle_btn = QPushButton("Export Plugin Bundle...")
+        self.export_bundle_btn.clicked.connect(self.export_bundle)
+        self.export_bundle_btn.setEnabled(False)
+        self.button_layout.addWidget(self.export_bundle_btn)
+
+        # Add build matrix button, builds several targets and configurations side by side
+        self.matrix_btn = QPushButton("Build Matrix...")
+        self.matrix_btn.clicked.connect(self.show_build_matrix)
+        self.matrix_btn.setEnabled(False)
+        self.button_layout.addWidget(self.matrix_btn)
+
+        # Add run history button, compares the project's latest run with the earlier ones
+        self.history_btn = QPushButton("Run History...")
+        self.history_btn.clicked.connect(self.show_history)
+        self.button_layout.addWidget(self.history_btn)
             
         # Add remove button at the bottom
         separator = QLabel("─" * 50)  # Visual separator
@@ -108,6 +345,7 @@ class ROSUESetupGUI(QMainWindow):
         self.layout.addWidget(self.project_group)
         self.layout.addWidget(self.log_group)
         self.layout.addWidget(self.progress_bar)
+        self.layout.addLayout(self.plugin_progress_layout)
         
         button_widget = QWidget()
         button_widget.setLayout(self.button_layout)
@@ -116,51 +354,75 @@ class ROSUESetupGUI(QMainWindow):
         self.main_widget.setLayout(self.layout)
         self.setCentralWidget(self.main_widget)
         
-        self.detect_unreal_engine()
-
-        # Add process handler
-        self.process = QProcess()
-        self.process.readyReadStandardOutput.connect(self.handle_stdout)
-        self.process.readyReadStandardError.connect(self.handle_stderr)
-        self.process.finished.connect(self.process_finished)
-
-    def detect_unreal_engine(self):
-        search_paths = [
-            "/opt/UnrealEngine",
-            "/opt/unreal-engine",
-            os.path.expanduser("~/UnrealEngine"),
-            "/opt/UE5",
-            "/opt/UnrealEngine5"
-        ]
-        
-        for path in search_paths:
-            if os.path.exists(os.path.join(path, "Engine/Build/BatchFiles/Linux/Build.sh")):
-                self.unreal_engine_path = path
-                break
+        self.log_message(f"Full log is written to {self.log_buffer.spill_path}")
         
-        if self.unreal_engine_path:
-            self.engine_status.setText("Unreal Engine 5 found at:")
-            self.engine_path_edit.setText(self.unreal_engine_path)
+        # Cached engines show up at once, a scan only runs in the background when they are stale
+        self.engine_registry = EngineRegistry(parent=self)
+        self.engine_registry.engines_changed.connect(self.engines_updated)
+        if self.engine_registry.load_cached():
+            self.engines_updated(self.engine_registry.engines)
+        else:
+            self.engine_registry.refresh_async()
+
+    def engines_updated(self, engines):
+        selected = self.unreal_engine_path
+        self.engine_combo.blockSignals(True)
+        self.engine_combo.clear()
+        for engine in engines:
+            self.engine_combo.addItem(engine_label(engine), engine["root"])
+        self.engine_combo.blockSignals(False)
+        self.engine_combo.setEnabled(bool(engines))
+        
+        if engines:
+            self.engine_status.setText(f"Unreal Engine 5 found ({len(engines)} installations):")
+            default = self.engine_registry.find(selected) if selected else self.engine_registry.default_engine()
+            self.select_engine((default or engines[0])["root"])
             self.project_group.setEnabled(True)
         else:
             self.engine_status.setText("Unreal Engine 5 not found automatically")
 
+    def rescan_engines(self):
+        self.engine_status.setText("Searching for Unreal Engine 5...")
+        self.engine_registry.refresh_async()
+
+    def select_engine(self, root):
+        index = self.engine_combo.findData(root)
+        if index >= 0:
+            self.engine_combo.setCurrentIndex(index)
+            self.engine_selected(index)
+
+    def engine_selected(self, index):
+        if index >= 0:
+            self.unreal_engine_path = self.engine_combo.itemData(index)
+
     def browse_engine(self):
         path = QFileDialog.getExistingDirectory(self, "Select Unreal Engine Root Directory")
         if path:
-            build_sh = os.path.join(path, "Engine/Build/BatchFiles/Linux/Build.sh")
-            if os.path.exists(build_sh):
-                self.unreal_engine_path = path
-                self.engine_path_edit.setText(path)
+            engine = self.engine_registry.add_custom(path)
+            if engine:
+                self.select_engine(engine["root"])
                 self.project_group.setEnabled(True)
             else:
                 QMessageBox.warning(self, "Invalid Directory", "Selected directory is not a valid Unreal Engine installation")
 
+    def select_project_engine(self, project_path):
+        """Switch to the engine the project's EngineAssociation asks for"""
+        engine, association = self.engine_registry.engine_for_project(project_path)
+        if engine:
+            self.select_engine(engine["root"])
+            self.log_message(f"Project uses engine '{association}': {engine_label(engine)}")
+        elif association:
+            self.log_message(f"No installed engine matches the project's EngineAssociation '{association}', "
+                             f"using {self.unreal_engine_path}", error=True)
+
     def browse_project(self):
         path, _ = QFileDialog.getOpenFileName(self, "Select Unreal Project", "", "Unreal Projects (*.uproject)")
         if path:
             self.selected_project = path
             self.project_path_edit.setText(path)
+            self.select_project_engine(path)
+            self.create_project_setup()
+            self.update_cache_scopes()
             # Reset completion status when new project is selected
             for step in self.steps_completed:
                 self.update_button_text(step, False)
@@ -168,21 +430,18 @@ class ROSUESetupGUI(QMainWindow):
             self.install_plugins_btn.setEnabled(self.validation_list.isChecked())
             self.update_project_btn.setEnabled(self.validation_list.isChecked())
             self.compile_btn.setEnabled(self.validation_list.isChecked())
+            self.run_all_btn.setEnabled(self.validation_list.isChecked())
+            self.install_bundle_btn.setEnabled(self.validation_list.isChecked())
+            self.export_bundle_btn.setEnabled(self.validation_list.isChecked())
+            self.watch_cb.setEnabled(self.validation_list.isChecked())
+            self.matrix_btn.setEnabled(self.validation_list.isChecked())
 
     def check_cpp_support(self, project_path):
         """Check if the project has C++ support"""
         try:
-            with open(project_path, 'r') as f:
-                project_data = json.load(f)
-            
-            project_name = os.path.basename(project_path).replace('.uproject', '')
-            
-            # Check for Modules section and matching module name
-            if "Modules" in project_data:
-                for module in project_data["Modules"]:
-                    if module.get("Name") == project_name:
-                        self.log_message("C++ support detected in project")
-                        return True
+            if check_cpp_support(project_path):
+                self.log_message("C++ support detected in project")
+                return True
             
             self.log_message("No C++ support detected in project", error=True)
             return False
@@ -210,6 +469,11 @@ class ROSUESetupGUI(QMainWindow):
         self.install_plugins_btn.setEnabled(buttons_enabled)
         self.update_project_btn.setEnabled(buttons_enabled)
         self.compile_btn.setEnabled(buttons_enabled)
+        self.run_all_btn.setEnabled(buttons_enabled)
+        self.install_bundle_btn.setEnabled(buttons_enabled)
+        self.export_bundle_btn.setEnabled(buttons_enabled)
+        self.watch_cb.setEnabled(buttons_enabled)
+        self.matrix_btn.setEnabled(buttons_enabled)
         self.remove_plugins_btn.setEnabled(buttons_enabled)
 
     def update_button_text(self, step, completed=False):
@@ -219,208 +483,286 @@ class ROSUESetupGUI(QMainWindow):
         button.setText(f"{base_text} ✓" if completed else base_text)
         self.steps_completed[step] = completed
 
+    def create_project_setup(self):
+        """Create the core engine for the selected project and connect it to the window"""
+        # Watch mode belongs to the previous project
+        self.watch_cb.setChecked(False)
+        if self.setup:
+            if self.setup.running:
+                self.setup.abort()
+            self.setup.deleteLater()
+        self.setup = ProjectSetup(self.selected_project, self.unreal_engine_path, self)
+        self.setup.mirror_cache = self.mirror_cache
+        self.setup.ask_existing_plugins = self.ask_existing_plugins
+        self.setup.confirm_plugin_updates = self.confirm_plugin_updates
+        self.setup.log.connect(self.log_message)
+        self.setup.output.connect(self.log_lines)
+        self.setup.progress.connect(self.progress_bar.setValue)
+        self.setup.build_progress.connect(self.build_progress)
+        self.setup.plugin_job_started.connect(self.add_plugin_progress_bar)
+        self.setup.plugin_job_progress.connect(self.plugin_job_progress)
+        self.setup.plugin_jobs_finished.connect(self.clear_plugin_progress_bars)
+        self.setup.step_finished.connect(self.step_finished)
+        self.setup.finished.connect(self.setup_finished)
+
+    def apply_setup_options(self):
+        self.setup.engine_path = self.unreal_engine_path
+        self.setup.clear_cache = self.clear_cache_cb.isChecked()
+        self.setup.cache_scope, self.setup.cache_plugins = self.cache_scope_combo.currentData()
+        self.setup.force_build = self.force_build_cb.isChecked()
+        self.setup.use_mirror_cache = self.mirror_cache_cb.isChecked()
+        self.setup.plugin_source = None
+        self.setup.use_binary_cache = self.binary_cache_cb.isChecked()
+        self.setup.compiler_cache = "auto" if self.compiler_cache_cb.isChecked() else None
+
+    def update_cache_scopes(self):
+        self.cache_scope_combo.clear()
+        self.cache_scope_combo.addItem("Clear everything", ("all", []))
+        self.cache_scope_combo.addItem("Clear game module only", ("game", []))
+        self.cache_scope_combo.addItem("Clear all plugins only", ("plugins", []))
+        if self.selected_project:
+            plugins_dir = os.path.join(os.path.dirname(self.selected_project), "Plugins")
+            if os.path.isdir(plugins_dir):
+                for name in sorted(os.listdir(plugins_dir)):
+                    if os.path.isdir(os.path.join(plugins_dir, name)):
+                        self.cache_scope_combo.addItem(f"Clear plugin {name} only", ("plugins", [name]))
+
     def start_step(self, step):
         if not all([self.unreal_engine_path, self.selected_project]):
             return
 
-        try:
-            if step == "plugins":
-                self.progress_bar.setValue(10)
-                self.install_plugins()
-                self.update_button_text("plugins", True)
-            elif step == "update":
-                self.progress_bar.setValue(40)
-                self.update_uproject_file()
-                self.update_button_text("update", True)
-            elif step == "compile":
-                self.progress_bar.setValue(60)
-                self.compile_project()
-                # Compile completion is handled in process_finished
-        except Exception as e:
-            self.log_message(f"Error during {step}: {str(e)}", error=True)
-            self.progress_bar.setValue(0)
-            self.update_button_text(step, False)
+        self.apply_setup_options()
+        # Completion is reported asynchronously through step_finished
+        self.setup.run([step], skip_valid=False)
+        self.cancel_btn.setEnabled(self.setup.running)
+
+    def build_progress(self, done, total, eta):
+        text = f"%p% ({done}/{total} actions"
+        self.progress_bar.setFormat(text + (f", ETA {format_duration(eta)})" if eta >= 0 else ")"))
+
+    def step_finished(self, step, success, error):
+        if step == "compile":
+            self.progress_bar.setFormat("%p%")
+        if step in self.steps_buttons:
+            self.update_button_text(step, success)
+        watch_build = self.watch_mode is not None and self.watch_mode.building
+        if step == "compile" and not self.running_all and not self.setup.cancelled and not watch_build:
+            note = self.setup.step_results.get("compile", {}).get("note")
+            if success and note:
+                QMessageBox.information(self, "Up to date", f"Compilation skipped: {note}")
+            elif success:
+                QMessageBox.information(self, "Success", "Compilation completed successfully!")
+            else:
+                QMessageBox.critical(self, "Error", "Compilation failed! Check the log for details.")
+
+    def setup_finished(self, success):
+        self.cancel_btn.setEnabled(False)
+        if not self.running_all:
+            return
+        self.running_all = False
+        if self.setup.cancelled:
+            self.log_message("Installation cancelled")
+        elif success:
+            QMessageBox.information(self, "Success", "Installation completed successfully!")
+        else:
+            QMessageBox.critical(self, "Error", "Installation failed! Check the log for details.")
 
     def log_message(self, message, error=False):
-        self.log_text.append(f"{'[ERROR] ' if error else ''}{message}")
-        self.log_text.verticalScrollBar().setValue(
-            self.log_text.verticalScrollBar().maximum()
-        )
+        self.log_lines(message.splitlines() or [""], error)
 
-    def handle_stdout(self):
-        data = self.process.readAllStandardOutput().data().decode()
-        self.log_message(data)
+    def log_lines(self, lines, error=False):
+        if error:
+            lines = [f"[ERROR] {line}" for line in lines]
+        self.log_buffer.extend(lines)
+        if not self.log_flush_timer.isActive():
+            self.log_flush_timer.start()
 
-    def handle_stderr(self):
-        data = self.process.readAllStandardError().data().decode()
-        self.log_message(data, error=True)
+    def flush_log(self):
+        lines, dropped = self.log_buffer.take()
+        if not lines:
+            self.log_flush_timer.stop()
+            return
+        # Lines that would be pushed out of the widget right away are not worth rendering
+        if len(lines) > self.LOG_MAX_BLOCKS:
+            dropped += len(lines) - self.LOG_MAX_BLOCKS
+            lines = lines[-self.LOG_MAX_BLOCKS:]
+        scroll_bar = self.log_text.verticalScrollBar()
+        # Only follow the output when the user has not scrolled up to read something
+        at_bottom = scroll_bar.value() >= scroll_bar.maximum() - 2
+        if dropped:
+            self.log_text.appendPlainText(f"... {dropped} lines skipped, see {self.log_buffer.spill_path}")
+        self.log_text.appendPlainText("\n".join(lines))
+        if at_bottom:
+            scroll_bar.setValue(scroll_bar.maximum())
+
+    def closeEvent(self, event):
+        self.log_buffer.close()
+        super().closeEvent(event)
 
     def start_installation(self):
         if not all([self.unreal_engine_path, self.selected_project]):
             return
 
+        self.apply_setup_options()
+        # Installed plugins are kept, the Install Plugins button asks about updating them
+        self.setup.existing_plugins_policy = "skip"
+        self.running_all = self.setup.run(ProjectSetup.STEPS, skip_valid=True)
+        self.cancel_btn.setEnabled(self.setup.running)
+
+    def toggle_watch_mode(self, enabled):
+        if enabled:
+            if not all([self.unreal_engine_path, self.selected_project, self.setup]):
+                self.watch_cb.setChecked(False)
+                return
+            self.apply_setup_options()
+            self.watch_mode = WatchMode(self.setup, parent=self)
+            self.watch_mode.start()
+        elif self.watch_mode:
+            self.watch_mode.stop()
+            self.watch_mode.deleteLater()
+            self.watch_mode = None
+
+    def install_from_bundle(self):
+        """Install the pinned plugins from a bundle exported on another machine, without network access"""
+        if not self.selected_project:
+            return
+        path, _ = QFileDialog.getOpenFileName(self, "Select Plugin Bundle", "", "Git bundles (*.bundle);;All files (*)")
+        if not path:
+            return
+        self.apply_setup_options()
+        self.setup.plugin_source = path
+        self.setup.run(["plugins"], skip_valid=False)
+        self.cancel_btn.setEnabled(self.setup.running)
+
+    def export_bundle(self):
+        """Write the pinned plugins into one bundle file for installs without network access"""
+        if not self.selected_project:
+            return
         try:
-            self.progress_bar.setValue(10)
-            self.install_plugins()
-            self.progress_bar.setValue(50)
-            self.update_uproject_file()
-            self.progress_bar.setValue(70)
-            self.compile_project()
-            self.progress_bar.setValue(100)
-            QMessageBox.information(self, "Success", "Installation completed successfully!")
+            pins = read_lock(self.selected_project)
         except Exception as e:
-            QMessageBox.critical(self, "Error", f"Installation failed: {str(e)}")
-            self.progress_bar.setValue(0)
-
-    def install_plugins(self):
-        self.log_message("Starting plugin installation...")
-        project_path = os.path.dirname(self.selected_project)
-        plugins_dir = os.path.join(project_path, "Plugins")
-        os.makedirs(plugins_dir, exist_ok=True)
-        
-        repos = [
-            ("https://github.com/mistrjirka/MetaLidar.git", "MetaLidar"),
-            ("https://gitlab.fel.cvut.cz/svitijir/roscontrol.git", "roscontrol"),
-            ("https://github.com/mistrjirka/MathToolkit.git", "MathToolkit")
-        ]
-        
-        existing_plugins = []
-        for _, name in repos:
-            if os.path.exists(os.path.join(plugins_dir, name)):
-                existing_plugins.append(name)
-        
-        if existing_plugins:
-            reply = QMessageBox.question(self, 'Plugins Already Exist',
-                f"The following plugins are already installed:\n{', '.join(existing_plugins)}\n\n"
-                "Do you want to delete and reinstall them with the latest version?",
-                QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
-            
-            if reply == QMessageBox.Yes:
-                for name in existing_plugins:
-                    import shutil
-                    self.log_message(f"Removing existing plugin: {name}")
-                    shutil.rmtree(os.path.join(plugins_dir, name))
-            else:
-                self.log_message("Plugin installation skipped by user")
-                return
-        
-        for url, name in repos:
-            target_dir = os.path.join(plugins_dir, name)
-            if not os.path.exists(target_dir):
-                self.log_message(f"Cloning {name}...")
-                process = subprocess.run(["git", "clone", url, target_dir], 
-                                      capture_output=True, text=True)
-                self.log_message(process.stdout)
-                if process.returncode != 0:
-                    self.log_message(process.stderr, error=True)
-                    raise Exception(f"Failed to clone {name}")
-
-        self.log_message("Plugin installation completed successfully!")
-        self.progress_bar.setValue(30)
-
-    def update_uproject_file(self):
-        self.log_message("Updating project file...")
-        required_plugins = {"MetaLidar", "roscontrol", "MathToolkit"}
-        
-        with open(self.selected_project, 'r') as f:
-            project_data = json.load(f)
-        
-        # Initialize Plugins array if it doesn't exist
-        if "Plugins" not in project_data:
-            project_data["Plugins"] = []
-            
-        # Get existing plugins and remove any duplicates of our plugins
-        existing_plugins = project_data["Plugins"]
-        project_data["Plugins"] = [p for p in existing_plugins 
-                                 if p["Name"] not in required_plugins]
-        
-        # Add our plugins if they're not already there
-        for plugin in required_plugins:
-            plugin_entry = {
-                "Name": plugin,
-                "Enabled": True
-            }
-            project_data["Plugins"].append(plugin_entry)
-            self.log_message(f"Added/Updated plugin: {plugin}")
-        
-        with open(self.selected_project, 'w') as f:
-            json.dump(project_data, f, indent=4)
-        self.log_message("Project file updated successfully!")
-        self.progress_bar.setValue(50)
-
-    def clear_project_cache(self, project_dir):
-        """Clear all cache directories in the project"""
-        self.log_message("Clearing project cache...")
-        import subprocess
-        
-        cmd = [
-            'find', project_dir,
-            '-type', 'd',
-            '(',
-            '-name', 'Binaries',
-            '-o', '-name', 'Intermediate',
-            '-o', '-name', 'Saved',
-            '-o', '-name', 'DerivedDataCache',
-            ')',
-            '-exec', 'rm', '-rf', '{}', '+'
-        ]
-        
+            QMessageBox.critical(self, "Error", str(e))
+            return
+        if pins is None:
+            QMessageBox.warning(self, "No Lockfile",
+                "The project has no plugin lockfile yet, install the plugins first to pin their commits.")
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Export Plugin Bundle", "rosue-plugins.bundle",
+                                              "Git bundles (*.bundle)")
+        if not path:
+            return
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            if result.returncode == 0:
-                self.log_message("Cache cleared successfully")
-            else:
-                self.log_message(f"Error clearing cache: {result.stderr}", error=True)
+            plugins_dir = os.path.join(os.path.dirname(self.selected_project), "Plugins")
+            size = export_plugin_bundle(plugins_dir, pins, path)
+            self.log_message(f"Wrote {len(pins)} pinned plugins to {path} ({format_size(size)})")
         except Exception as e:
-            self.log_message(f"Failed to clear cache: {str(e)}", error=True)
+            QMessageBox.critical(self, "Error", f"Failed to export plugins: {str(e)}")
 
-    def compile_project(self):
-        self.log_message("Starting project compilation...")
-        project_dir = os.path.dirname(self.selected_project)
-        
-        # Clear cache if option is selected
-        if self.clear_cache_cb.isChecked():
-            self.clear_project_cache(project_dir)
-        
-        project_name = os.path.basename(self.selected_project).replace('.uproject', '')
-        build_script = "/opt/unreal-engine/Engine/Build/BatchFiles/Linux/Build.sh"
-        
-        if not os.path.exists(build_script):
-            self.log_message(f"Build script not found at: {build_script}", error=True)
-            build_script = os.path.join(self.unreal_engine_path, "Engine/Build/BatchFiles/Linux/Build.sh")
-            self.log_message(f"Falling back to: {build_script}")
-            
-            if not os.path.exists(build_script):
-                raise Exception("Could not find Build.sh script!")
-        
-        command = [
-            build_script,
-            f"{project_name}Editor",
-            "Linux",
-            "Development",
-            f"-Project={self.selected_project}"  # Removed extra quotes that could cause issues
-        ]
-        
-        self.log_message(f"Running command: {' '.join(command)}")
-        
-        # Ensure build script is executable
-        os.chmod(build_script, 0o755)
-        
-        # Set working directory to UE directory to ensure proper build context
-        self.process.setWorkingDirectory(os.path.dirname(os.path.dirname(os.path.dirname(build_script))))
-        self.process.start(command[0], command[1:])
-
-    def process_finished(self, exit_code, exit_status):
-        if exit_code == 0:
-            self.log_message("Compilation completed successfully!")
-            self.progress_bar.setValue(100)
-            self.update_button_text("compile", True)
-            QMessageBox.information(self, "Success", "Compilation completed successfully!")
-        else:
-            self.log_message("Compilation failed!", error=True)
-            self.progress_bar.setValue(0)
-            self.update_button_text("compile", False)
-            QMessageBox.critical(self, "Error", "Compilation failed! Check the log for details.")
+    def cancel(self):
+        if self.setup and self.setup.running:
+            self.log_message("Cancelling...", error=True)
+            self.setup.abort()
+
+    def ask_existing_plugins(self, existing_plugins):
+        """Ask how to handle installed plugins, returns "update", "reinstall" or None"""
+        box = QMessageBox(self)
+        box.setIcon(QMessageBox.Question)
+        box.setWindowTitle('Plugins Already Exist')
+        box.setText(f"The following plugins are already installed:\n{', '.join(existing_plugins)}\n\n"
+                    "Do you want to update them in place to the latest version and pin it in the lockfile "
+                    "(keeps their build outputs) or delete and reinstall them from scratch?")
+        update_btn = box.addButton("Update", QMessageBox.AcceptRole)
+        reinstall_btn = box.addButton("Reinstall", QMessageBox.DestructiveRole)
+        box.addButton(QMessageBox.Cancel)
+        box.setDefaultButton(update_btn)
+        box.exec_()
+        if box.clickedButton() == update_btn:
+            return "update"
+        if box.clickedButton() == reinstall_btn:
+            return "reinstall"
+        return None
+
+    def confirm_plugin_updates(self, changes):
+        """Show the pending plugin changes, returns "fast-forward", "reset" or None"""
+        lines = []
+        for name, status in changes.items():
+            line = f"{name}: {status['old'][:8]} → {status['new'][:8]} ({status['commits']} new commits)"
+            if not status["fast_forward"]:
+                line += ", diverged from upstream"
+            if status["dirty"]:
+                line += ", has local modifications"
+            lines.append(line)
+        box = QMessageBox(self)
+        box.setIcon(QMessageBox.Question)
+        box.setWindowTitle('Plugin Updates')
+        box.setText("The following plugins have upstream changes:\n" + "\n".join(lines) + "\n\n"
+                    "Fast-forward keeps local commits and fails if the history diverged. "
+                    "Hard reset discards any local changes to the plugins.")
+        ff_btn = box.addButton("Fast-forward", QMessageBox.AcceptRole)
+        reset_btn = box.addButton("Hard reset", QMessageBox.DestructiveRole)
+        box.addButton(QMessageBox.Cancel)
+        box.setDefaultButton(ff_btn)
+        box.exec_()
+        if box.clickedButton() == ff_btn:
+            return "fast-forward"
+        if box.clickedButton() == reset_btn:
+            return "reset"
+        return None
+
+    def add_plugin_progress_bar(self, name):
+        bar = QProgressBar()
+        bar.setFormat(f"{name}: %p%")
+        bar.setValue(0)
+        self.plugin_progress_layout.addWidget(bar)
+        self.plugin_progress_bars[name] = bar
+
+    def clear_plugin_progress_bars(self):
+        for bar in self.plugin_progress_bars.values():
+            self.plugin_progress_layout.removeWidget(bar)
+            bar.deleteLater()
+        self.plugin_progress_bars = {}
+
+    def plugin_job_progress(self, name, percent):
+        if name in self.plugin_progress_bars:
+            self.plugin_progress_bars[name].setValue(percent)
+
+    def show_build_matrix(self):
+        if not all([self.unreal_engine_path, self.selected_project]):
+            return
+        if self.setup and self.setup.running:
+            self.log_message("Cannot start the build matrix while a step is running", error=True)
+            return
+        self.apply_setup_options()
+        options = {"force_build": self.setup.force_build, "compiler_cache": self.setup.compiler_cache}
+        BuildMatrixDialog(self.selected_project, self.unreal_engine_path, options, self).exec_()
+
+    def show_history(self):
+        history = self.setup.history if self.setup else History()
+        runs = history.runs(self.selected_project) if self.selected_project else history.runs()
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Run History")
+        dialog.resize(760, 520)
+        layout = QVBoxLayout(dialog)
+        text = QPlainTextEdit(format_comparison(runs))
+        text.setReadOnly(True)
+        text.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        layout.addWidget(text)
+        export_btn = QPushButton("Export Latest Run as Chrome Trace...")
+        export_btn.setEnabled(bool(runs))
+        export_btn.clicked.connect(lambda: self.export_trace(runs[-1]))
+        layout.addWidget(export_btn)
+        dialog.exec_()
+
+    def export_trace(self, run):
+        path, _ = QFileDialog.getSaveFileName(self, "Export Chrome Trace", f"rosue-{run['id']}.json",
+                                              "Trace files (*.json)")
+        if not path:
+            return
+        try:
+            write_chrome_trace(run, path)
+            self.log_message(f"Trace written to {path}, open it in chrome://tracing or ui.perfetto.dev")
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"Failed to write trace: {str(e)}")
 
     def remove_plugins(self):
         """Remove ROSUE plugins from project"""
@@ -436,33 +778,16 @@ class ROSUESetupGUI(QMainWindow):
         if reply != QMessageBox.Yes:
             return
             
+        if self.setup and self.setup.running:
+            self.log_message("Cannot remove plugins while a step is running", error=True)
+            return
+            
         try:
             self.log_message("Starting plugin removal...")
-            project_path = os.path.dirname(self.selected_project)
-            plugins_dir = os.path.join(project_path, "Plugins")
-            
-            # Remove plugin directories
-            plugins_to_remove = ["MetaLidar", "roscontrol", "MathToolkit"]
-            for name in plugins_to_remove:
-                plugin_path = os.path.join(plugins_dir, name)
-                if os.path.exists(plugin_path):
-                    import shutil
-                    self.log_message(f"Removing plugin directory: {name}")
-                    shutil.rmtree(plugin_path)
-            
-            # Remove from uproject file
-            with open(self.selected_project, 'r') as f:
-                project_data = json.load(f)
-            
-            if "Plugins" in project_data:
-                original_count = len(project_data["Plugins"])
-                project_data["Plugins"] = [p for p in project_data["Plugins"] 
-                                         if p["Name"] not in plugins_to_remove]
-                removed_count = original_count - len(project_data["Plugins"])
-                self.log_message(f"Removed {removed_count} plugin entries from project configuration")
-                
-                with open(self.selected_project, 'w') as f:
-                    json.dump(project_data, f, indent=4)
+            removed_dirs, removed_count = remove_plugins(self.selected_project)
+            for name in removed_dirs:
+                self.log_message(f"Removed plugin directory: {name}")
+            self.log_message(f"Removed {removed_count} plugin entries from project configuration")
             
             self.log_message("Plugin removal completed successfully!")
             
@@ -476,8 +801,157 @@ class ROSUESetupGUI(QMainWindow):
             self.log_message(f"Error removing plugins: {str(e)}", error=True)
             QMessageBox.critical(self, "Error", f"Failed to remove plugins: {str(e)}")
 
+def run_batch(argv):
+    """Headless entry point: set up every given project without a display"""
+    parser = argparse.ArgumentParser(
+        description="Install the ROSUE plugins into Unreal projects and build them without the GUI.")
+    parser.add_argument("projects", nargs="+", help=".uproject files to set up")
+    parser.add_argument("--engine", help="Unreal Engine root directory for every project "
+                                         "(default: the engine matching each project's EngineAssociation)")
+    parser.add_argument("-j", "--jobs", type=int, default=2,
+                        help="number of projects set up concurrently (default: 2)")
+    parser.add_argument("--steps", default=",".join(ProjectSetup.STEPS),
+                        help="comma separated steps to run, independent ones overlap (default: %(default)s, "
+                             "compile adds engine validation and the cache clear)")
+    parser.add_argument("--existing-plugins", choices=["skip", "update", "reinstall"],
+                        help="what to do with plugins that are already installed, update moves them to upstream "
+                             "and pins the new commits in the lockfile (default: skip for projects with a plugin "
+                             "lockfile, update otherwise)")
+    parser.add_argument("--hard-reset", action="store_true",
+                        help="hard reset updated plugins instead of fast-forwarding them")
+    parser.add_argument("--clear-cache", action="store_true", help="clear the project cache before compiling")
+    parser.add_argument("--cache-scope", default="all",
+                        help="what --clear-cache clears: all, game, plugins or comma separated plugin names "
+                             "(default: %(default)s)")
+    parser.add_argument("--force-build", action="store_true",
+                        help="build even if nothing changed since the last successful build")
+    parser.add_argument("--max-parallel-actions", type=int, default=0,
+                        help="UBT actions run in parallel (default: chosen from the cores and the free memory)")
+    parser.add_argument("--compiler-cache", choices=["auto", "ccache", "sccache"],
+                        help="route compiles through a compiler cache (default: off)")
+    parser.add_argument("--compiler-cache-dir",
+                        help="directory of the compiler cache (default: ~/.cache/rosue/compiler-cache)")
+    parser.add_argument("--no-mirror-cache", action="store_true", help="clone directly from upstream")
+    parser.add_argument("--plugin-source",
+                        help="install the plugins pinned in each project's lockfile from this bundle or directory, "
+                             "without network access")
+    parser.add_argument("--no-binary-cache", action="store_true",
+                        help="build the plugins from source instead of reusing cached plugin binaries")
+    parser.add_argument("--matrix", action="store_true",
+                        help="only build, every combination of --targets and --configurations, -j builds at a time")
+    parser.add_argument("--targets", default=",".join(MATRIX_TARGETS),
+                        help="target types built by --matrix (default: %(default)s)")
+    parser.add_argument("--configurations", default=",".join(MATRIX_CONFIGURATIONS),
+                        help="configurations built by --matrix (default: %(default)s)")
+    parser.add_argument("--cpu-budget", type=int, default=0,
+                        help="cores shared by the concurrent --matrix builds (default: all)")
+    parser.add_argument("--overlap-targets", action="store_true",
+                        help="let --matrix build different target types of a project concurrently once its first "
+                             "build finished, by default a project builds one job at a time")
+    parser.add_argument("--summary", default="-", help="write the JSON summary to this file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    steps = [step.strip() for step in args.steps.split(",") if step.strip()]
+    unknown = [step for step in steps if step not in ProjectSetup.DEPENDENCIES]
+    if unknown:
+        parser.error(f"unknown steps: {', '.join(unknown)}")
+    targets = [target.strip() for target in args.targets.split(",") if target.strip()]
+    configurations = [configuration.strip() for configuration in args.configurations.split(",")
+                      if configuration.strip()]
+    unknown = ([target for target in targets if target not in TARGET_SUFFIXES] +
+               [configuration for configuration in configurations if configuration not in CONFIGURATIONS])
+    if unknown:
+        parser.error(f"unknown targets or configurations: {', '.join(unknown)}")
+    engine_path = args.engine
+    registry = EngineRegistry()
+    if not engine_path and not registry.load_cached():
+        registry.discover()
+    if ("compile" in steps or args.matrix) and not engine_path and not registry.engines:
+        parser.error("Unreal Engine 5 not found automatically, pass --engine")
+    projects = list(dict.fromkeys(os.path.abspath(path) for path in args.projects))
+    if args.cache_scope in ("all", "game", "plugins"):
+        cache_scope, cache_plugins = args.cache_scope, []
+    else:
+        cache_scope, cache_plugins = "plugins", [name.strip() for name in args.cache_scope.split(",")]
+
+    app = QCoreApplication(sys.argv[:1])
+    # Let Ctrl+C terminate immediately, the child processes receive it as well
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    options = {
+        "clear_cache": args.clear_cache,
+        "cache_scope": cache_scope,
+        "cache_plugins": cache_plugins,
+        "force_build": args.force_build,
+        "skip_valid_steps": True,
+        "use_mirror_cache": not args.no_mirror_cache,
+        "plugin_source": os.path.abspath(args.plugin_source) if args.plugin_source else None,
+        "use_binary_cache": not args.no_binary_cache,
+        "max_parallel_actions": args.max_parallel_actions or None,
+        "compiler_cache": args.compiler_cache,
+        "compiler_cache_dir": args.compiler_cache_dir,
+        "existing_plugins_policy": args.existing_plugins,
+        "update_mode": "reset" if args.hard_reset else "fast-forward"
+    }
+
+    def log(name, message, error):
+        for line in message.splitlines():
+            print(f"[{name}] {'[ERROR] ' if error else ''}{line}", file=sys.stderr, flush=True)
+
+    if args.matrix:
+        matrix = BuildMatrix(projects, engine_path, targets, configurations, args.jobs, args.cpu_budget or None,
+                             options, args.overlap_targets)
+        matrix.engine_registry = registry
+        matrix.job_output.connect(lambda name, lines, error: log(name, "\n".join(lines), error))
+        matrix.job_finished.connect(lambda name, result: print(
+            f"[{name}] {result['status'].upper()} in {result['seconds']:.1f}s"
+            + (f" ({result['error']})" if result["error"] else ""), file=sys.stderr, flush=True))
+        matrix.finished.connect(lambda results: app.quit())
+        QTimer.singleShot(0, matrix.start)
+        app.exec_()
+        print(format_matrix(matrix.results, targets, configurations), file=sys.stderr, flush=True)
+        return write_summary(matrix.summary(), args.summary)
+
+    runner = BatchRunner(projects, engine_path, steps, args.jobs, options)
+    runner.engine_registry = registry
+
+    def project_finished(result):
+        print(f"[{project_name(result['project'])}] {result['status'].upper()} in {result['seconds']:.1f}s"
+              + (f" ({result['failed_step']}: {result['error']})" if result["failed_step"] else ""),
+              file=sys.stderr, flush=True)
+
+    results = []
+    def finished(batch_results):
+        results.extend(batch_results)
+        app.quit()
+
+    runner.log.connect(log)
+    runner.project_finished.connect(project_finished)
+    runner.finished.connect(finished)
+    QTimer.singleShot(0, runner.start)
+    app.exec_()
+
+    failed = sum(1 for result in results if result["status"] != "success")
+    return write_summary({
+        "engine": engine_path,
+        "succeeded": len(results) - failed,
+        "failed": failed,
+        "projects": results
+    }, args.summary)
+
+def write_summary(summary, path):
+    """Write the JSON summary to path or stdout for "-", returns the exit code"""
+    text = json.dumps(summary, indent=4)
+    if path == "-":
+        print(text)
+    else:
+        with open(path, 'w') as f:
+            f.write(text + "\n")
+    return 1 if summary["failed"] else 0
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(run_batch(sys.argv[1:]))
     app = QApplication(sys.argv)
     window = ROSUESetupGUI()
     window.show()
-    sys.exit(app.exec_())
\ No newline at end of file
+    sys.exit(app.exec_())
@@ -0,0 +1,80 @@
+import os
+import sys
+import hashlib
+import subprocess
+
+from directory_cache import DirectoryCache, cache_main
+
+# Mirrors are evicted least recently used first once the cache grows past this size
+DEFAULT_MAX_SIZE = 2 * 1024 ** 3
+
+def default_cache_root():
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.environ.get("ROSUE_MIRROR_CACHE") or os.path.join(cache_home, "rosue", "mirrors")
+
+def default_max_size():
+    value = os.environ.get("ROSUE_MIRROR_CACHE_MAX_MB")
+    return int(value) * 1024 ** 2 if value else DEFAULT_MAX_SIZE
+
+class MirrorCache(DirectoryCache):
+    """Bare mirrors of the plugin repositories shared by every project on the machine
+
+    Projects clone from the local mirror (git hardlinks the objects), so only
+    the first install downloads the full history and later ones fetch deltas.
+    """
+
+    def __init__(self, root=None):
+        super().__init__(root or default_cache_root())
+
+    def default_max_size(self):
+        return default_max_size()
+
+    def mirror_path(self, url):
+        name = os.path.basename(url.rstrip("/"))
+        if name.endswith(".git"):
+            name = name[:-4]
+        digest = hashlib.sha1(url.encode()).hexdigest()[:10]
+        return os.path.join(self.root, f"{name}-{digest}.git")
+
+    def has_mirror(self, url):
+        return os.path.exists(os.path.join(self.mirror_path(url), "HEAD"))
+
+    def update_commands(self, url):
+        """Git commands that create or refresh the mirror of url"""
+        path = self.mirror_path(url)
+        if self.has_mirror(url):
+            return [["-C", path, "fetch", "--prune", "--progress", "origin",
+                     "+refs/heads/*:refs/heads/*", "+refs/tags/*:refs/tags/*"]]
+        os.makedirs(self.root, exist_ok=True)
+        return [["clone", "--bare", "--progress", url, path]]
+
+    def clone_commands(self, url, target_dir):
+        """Git commands that check out target_dir from the mirror and point it at upstream"""
+        return [
+            ["clone", "--progress", self.mirror_path(url), target_dir],
+            ["-C", target_dir, "remote", "set-url", "origin", url]
+        ]
+
+    def touch(self, url):
+        self.touch_entry(self.mirror_path(url))
+
+    def entry_info(self, name, path):
+        if not os.path.exists(os.path.join(path, "HEAD")):
+            return None
+        result = subprocess.run(["git", "config", "--file", os.path.join(path, "config"),
+                                 "remote.origin.url"], capture_output=True, text=True)
+        return {"url": result.stdout.strip()}
+
+    def evict(self, max_size=None, keep=()):
+        """Remove least recently used mirrors until the cache fits into max_size
+
+        Mirrors of the urls in keep are never removed. Returns the removed entries.
+        """
+        return self.evict_paths(max_size, {self.mirror_path(url) for url in keep})
+
+def main(argv):
+    return cache_main(MirrorCache(), argv, "mirror_cache.py", "mirrors",
+                      lambda entry: entry["url"] or entry["path"])
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
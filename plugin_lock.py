@@ -0,0 +1,174 @@
+"""Pin the ROSUE plugins of a project to exact commits and install them offline
+
+The lockfile next to the .uproject records each plugin's URL and commit.
+Installs check those commits out instead of the moving default branch, from
+upstream or from a local source: a bundle written by export_bundle or a
+directory holding the plugin repositories. Updating the plugins from upstream
+moves them to the latest commits and pins those.
+"""
+import os
+import sys
+import json
+import shutil
+import tempfile
+import subprocess
+
+from directory_cache import format_size
+from mirror_cache import MirrorCache
+
+LOCK_FILE = "rosue-plugins.lock"
+LOCK_VERSION = 1
+# Each plugin's pinned commit is stored under this prefix in a bundle
+BUNDLE_REF_PREFIX = "refs/rosue/"
+
+def git(args, cwd=None):
+    """Run git, returns its stripped output and raises with git's error message when it fails"""
+    result = subprocess.run(["git"] + args, cwd=cwd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise Exception(result.stderr.strip() or f"git {args[0]} failed")
+    return result.stdout.strip()
+
+def lock_path(project_path):
+    return os.path.join(os.path.dirname(project_path), LOCK_FILE)
+
+def read_lock(project_path):
+    """Map plugin names to {"url", "commit"}, None when the project has no lockfile"""
+    path = lock_path(project_path)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+        return {plugin["name"]: {"url": plugin["url"], "commit": plugin["commit"]} for plugin in data["plugins"]}
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        raise Exception(f"Invalid lockfile {path}: {str(e)}")
+
+def write_lock(project_path, pins):
+    path = lock_path(project_path)
+    data = {"version": LOCK_VERSION,
+            "plugins": [{"name": name, "url": pin["url"], "commit": pin["commit"]} for name, pin in pins.items()]}
+    with open(path + ".tmp", 'w') as f:
+        json.dump(data, f, indent=4)
+        f.write("\n")
+    os.replace(path + ".tmp", path)
+    return path
+
+def installed_pins(plugins_dir, plugins):
+    """Pins of the checked out commits of plugins, (url, name) pairs"""
+    pins = {}
+    for url, name in plugins:
+        target_dir = os.path.join(plugins_dir, name)
+        if not os.path.exists(os.path.join(target_dir, ".git")):
+            raise Exception(f"{name} is not installed as a git checkout")
+        pins[name] = {"url": url, "commit": git(["-C", target_dir, "rev-parse", "HEAD"])}
+    return pins
+
+def mismatched_pins(plugins_dir, pins):
+    """Map the installed plugins that are not at their pinned commit to their current commit"""
+    mismatched = {}
+    for name, pin in pins.items():
+        target_dir = os.path.join(plugins_dir, name)
+        if not os.path.exists(os.path.join(target_dir, ".git")):
+            continue
+        try:
+            head = git(["-C", target_dir, "rev-parse", "HEAD"])
+        except Exception:
+            head = None
+        if head != pin["commit"]:
+            mismatched[name] = head
+    return mismatched
+
+def is_bundle(path):
+    return os.path.isfile(path)
+
+def bundle_refs(bundle_path):
+    """Map the refs stored in a bundle to their commits"""
+    refs = {}
+    for line in git(["bundle", "list-heads", bundle_path]).splitlines():
+        commit, _, ref = line.partition(" ")
+        refs[ref] = commit
+    return refs
+
+def source_fetch(source, name, url, commit):
+    """Repository and refspec to fetch a pinned plugin commit from a bundle or directory"""
+    if is_bundle(source):
+        return source, f"{BUNDLE_REF_PREFIX}{name}"
+    # Plugin checkouts, bare clones or a copy of the mirror cache
+    for candidate in (os.path.join(source, name), os.path.join(source, f"{name}.git"),
+                      MirrorCache(source).mirror_path(url)):
+        if os.path.exists(os.path.join(candidate, ".git")) or os.path.exists(os.path.join(candidate, "HEAD")):
+            return candidate, commit
+    raise Exception(f"No repository of {name} in {source}")
+
+def check_source(source, pins):
+    """Make sure the bundle or directory holds every pinned commit, raises otherwise"""
+    if not os.path.exists(source):
+        raise Exception(f"Plugin source {source} does not exist")
+    if is_bundle(source):
+        refs = bundle_refs(source)
+        for name, pin in pins.items():
+            commit = refs.get(f"{BUNDLE_REF_PREFIX}{name}")
+            if commit is None:
+                raise Exception(f"{source} does not contain {name}")
+            if commit != pin["commit"]:
+                raise Exception(f"{source} holds {name} at {commit[:8]}, the lockfile pins {pin['commit'][:8]}")
+        return
+    for name, pin in pins.items():
+        repository, _ = source_fetch(source, name, pin["url"], pin["commit"])
+        try:
+            git(["-C", repository, "cat-file", "-e", f"{pin['commit']}^{{commit}}"])
+        except Exception:
+            raise Exception(f"{repository} does not contain the pinned commit {pin['commit'][:8]} of {name}")
+
+def export_bundle(plugins_dir, pins, bundle_path):
+    """Write the pinned commits of every plugin, with their history, into one git bundle"""
+    staging = tempfile.mkdtemp(prefix=".rosue-bundle-", dir=os.path.dirname(os.path.abspath(bundle_path)))
+    try:
+        git(["init", "-q", "--bare", staging])
+        for name, pin in pins.items():
+            git(["-C", os.path.join(plugins_dir, name), "push", "-q", staging,
+                 f"{pin['commit']}:{BUNDLE_REF_PREFIX}{name}"])
+        git(["-C", staging, "bundle", "create", "-q", os.path.abspath(bundle_path), "--all"])
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return os.path.getsize(bundle_path)
+
+def main(argv):
+    if len(argv) < 2 or argv[0] not in ("show", "pin", "export", "check"):
+        print("Usage: plugin_lock.py [show PROJECT | pin PROJECT | export PROJECT OUTPUT.bundle | check PROJECT SOURCE]")
+        return 1
+    from setup_core import ROSUE_PLUGINS
+    project_path = os.path.abspath(argv[1])
+    plugins_dir = os.path.join(os.path.dirname(project_path), "Plugins")
+    try:
+        if argv[0] == "pin":
+            path = write_lock(project_path, installed_pins(plugins_dir, ROSUE_PLUGINS))
+            print(f"Pinned the installed plugins in {path}")
+            return 0
+        pins = read_lock(project_path)
+        if pins is None:
+            print(f"{project_path} has no lockfile, run: plugin_lock.py pin {argv[1]}")
+            return 1
+        if argv[0] == "show":
+            mismatched = mismatched_pins(plugins_dir, pins)
+            for name, pin in pins.items():
+                state = ""
+                if name in mismatched:
+                    state = f"  (installed: {(mismatched[name] or 'unknown')[:8]})"
+                print(f"{name:12} {pin['commit']}  {pin['url']}{state}")
+        elif argv[0] == "export" and len(argv) > 2:
+            size = export_bundle(plugins_dir, pins, argv[2])
+            print(f"Wrote {len(pins)} plugins to {argv[2]} ({format_size(size)})")
+        elif argv[0] == "check" and len(argv) > 2:
+            check_source(argv[2], pins)
+            print(f"{argv[2]} holds every pinned plugin commit")
+        else:
+            print("Usage: plugin_lock.py export PROJECT OUTPUT.bundle | check PROJECT SOURCE")
+            return 1
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
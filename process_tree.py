@@ -0,0 +1,68 @@
+import os
+import signal
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+def parent_pids():
+    """Map every running process to its parent, read from /proc"""
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", 'r') as f:
+                # The command name may contain spaces and parentheses, the fields after it do not
+                parents[int(entry)] = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+    return parents
+
+def descendants(pid):
+    """Process IDs of every child of pid, grandchildren included"""
+    children = {}
+    for child, parent in parent_pids().items():
+        children.setdefault(parent, []).append(child)
+    found = []
+    stack = [pid]
+    while stack:
+        for child in children.get(stack.pop(), []):
+            found.append(child)
+            stack.append(child)
+    return found
+
+def kill_tree(pid):
+    """Kill pid and everything it started, Build.sh leaves UnrealBuildTool and compilers running otherwise"""
+    # Collected first, killed children are reparented and could not be found afterwards
+    for target in [pid] + descendants(pid):
+        try:
+            os.kill(target, signal.SIGKILL)
+        except OSError:
+            pass
+
+def rss(pid):
+    """Resident memory of one process in bytes, 0 if it is gone"""
+    try:
+        with open(f"/proc/{pid}/statm", 'r') as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return 0
+
+def tree_rss(pid):
+    """Resident memory of pid and everything it started"""
+    return sum(rss(target) for target in [pid] + descendants(pid))
+
+def children_rss(pid=None):
+    """Resident memory of everything pid, this process by default, started"""
+    return sum(rss(target) for target in descendants(pid or os.getpid()))
+
+def memory_info():
+    """Total and available system memory in bytes, from /proc/meminfo"""
+    values = {}
+    try:
+        with open("/proc/meminfo", 'r') as f:
+            for line in f:
+                name, _, rest = line.partition(":")
+                values[name] = int(rest.split()[0]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return {"total": values.get("MemTotal", 0), "available": values.get("MemAvailable", values.get("MemFree", 0))}
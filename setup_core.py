@@ -0,0 +1,1485 @@
+import os
+import re
+import time
+import shutil
+import hashlib
+import threading
+import subprocess
+from PyQt5.QtCore import QProcess, QObject, QProcessEnvironment, QTimer, pyqtSignal
+from directory_cache import directory_size, format_size
+from mirror_cache import MirrorCache
+from build_log import LineDecoder
+from build_progress import SourceIndex, UBTProgressParser, format_duration
+from cache_clear import BackgroundDeleter, cache_targets, move_aside
+import build_fingerprint
+from binary_cache import (BinaryCache, cache_key, clear_key_marker, config_outputs, plugin_dependencies,
+                          read_key_marker, target_type, write_key_marker)
+from compiler_cache import (cache_environment, engine_toolchain, estimate_saved, make_wrapper_toolchain,
+                            stats_difference, default_cache_dir as default_compiler_cache_dir,
+                            find_tool as find_compiler_cache, read_stats as read_compiler_cache_stats)
+from process_tree import children_rss, kill_tree, memory_info, tree_rss
+from telemetry import History, children_cpu, parse_git_size
+from build_memory import (MAX_BUILD_ATTEMPTS, choose_parallel_actions, has_compile_error, has_memory_error,
+                          is_low_memory, is_memory_failure, memory_per_action)
+from engine_registry import BUILD_SCRIPT, BUILD_VERSION, project_association, project_engine_root
+from uproject import load_uproject
+from plugin_lock import check_source, installed_pins, lock_path, mismatched_pins, read_lock, source_fetch, write_lock
+
+# Target types UnrealBuildTool can build and the suffix of their target name
+TARGET_SUFFIXES = {"Editor": "Editor", "Game": "", "Server": "Server", "Client": "Client"}
+CONFIGURATIONS = ["Debug", "DebugGame", "Development", "Test", "Shipping"]
+
+ROSUE_PLUGINS = [
+    ("https://github.com/mistrjirka/MetaLidar.git", "MetaLidar"),
+    ("https://gitlab.fel.cvut.cz/svitijir/roscontrol.git", "roscontrol"),
+    ("https://github.com/mistrjirka/MathToolkit.git", "MathToolkit")
+]
+
+class GitJob(QObject):
+    """Run a sequence of git commands in a QProcess and report their combined progress
+
+    Each step is (arguments, start, end, optional): its progress is mapped onto
+    the start-end range of the overall percentage, and a failing optional step
+    is reported as a warning instead of failing the job.
+    """
+    progress = pyqtSignal(str, int)
+    warning = pyqtSignal(str, str)
+    finished = pyqtSignal(str, bool, str)
+
+    # Fraction of a step covered by each phase of git's --progress output
+    PHASES = {
+        "Receiving objects": (0, 70),
+        "Resolving deltas": (70, 90),
+        "Updating files": (90, 100)
+    }
+    PROGRESS_RE = re.compile(r"(Receiving objects|Resolving deltas|Updating files):\s+(\d+)%")
+    RECEIVED_RE = re.compile(r"Receiving objects:.*?,\s*([\d.]+)\s*(bytes|KiB|MiB|GiB)")
+
+    def __init__(self, name, steps, parent=None):
+        super().__init__(parent)
+        self.name = name
+        self.steps = list(steps)
+        self.current = None
+        self.percent = 0
+        self.messages = []
+        self.buffer = ""
+        # Bytes git downloaded in the finished steps and in the running one
+        self.received_bytes = 0
+        self.step_received = 0
+        self.process = QProcess(self)
+        # Never block on a credential prompt nobody can answer
+        env = QProcessEnvironment.systemEnvironment()
+        env.insert("GIT_TERMINAL_PROMPT", "0")
+        self.process.setProcessEnvironment(env)
+        self.process.readyReadStandardError.connect(self.handle_stderr)
+        self.process.finished.connect(self.process_finished)
+        self.process.errorOccurred.connect(self.process_error)
+
+    def start(self):
+        self.start_next_step()
+
+    def start_next_step(self):
+        self.received_bytes += self.step_received
+        self.step_received = 0
+        if not self.steps:
+            self.percent = 100
+            self.progress.emit(self.name, 100)
+            self.finished.emit(self.name, True, "")
+            return
+        self.current = self.steps.pop(0)
+        self.messages = []
+        self.buffer = ""
+        self.process.start("git", self.current[0])
+
+    def abort(self):
+        self.steps = []
+        if self.process.state() != QProcess.NotRunning:
+            kill_tree(self.process.processId())
+
+    def handle_stderr(self):
+        self.buffer += self.process.readAllStandardError().data().decode(errors="replace")
+        # Progress lines are terminated by \r, everything else by \n
+        *lines, self.buffer = re.split(r"[\r\n]", self.buffer)
+        for line in lines:
+            self.parse_line(line.strip())
+
+    def parse_line(self, line):
+        if not line:
+            return
+        match = self.PROGRESS_RE.search(line)
+        if not match:
+            if not line.startswith("remote:"):
+                self.messages.append(line)
+            return
+        received = self.RECEIVED_RE.search(line)
+        if received:
+            self.step_received = max(self.step_received, parse_git_size(*received.groups()))
+        _, start, end, _ = self.current
+        phase_start, phase_end = self.PHASES[match.group(1)]
+        phase = phase_start + (phase_end - phase_start) * int(match.group(2)) / 100
+        percent = int(start + (end - start) * phase / 100)
+        if percent > self.percent:
+            self.percent = percent
+            self.progress.emit(self.name, percent)
+
+    def error_message(self, exit_code):
+        errors = [m for m in self.messages if m.startswith(("fatal:", "error:"))]
+        return "\n".join(errors or self.messages[-3:]) or f"git exited with code {exit_code}"
+
+    def process_finished(self, exit_code, exit_status):
+        self.parse_line(self.buffer.strip())
+        self.buffer = ""
+        _, _, end, optional = self.current
+        if exit_status == QProcess.NormalExit and exit_code == 0:
+            self.percent = max(self.percent, end)
+            self.progress.emit(self.name, self.percent)
+            self.start_next_step()
+        elif optional and exit_status == QProcess.NormalExit:
+            self.warning.emit(self.name, self.error_message(exit_code))
+            self.start_next_step()
+        else:
+            self.steps = []
+            self.finished.emit(self.name, False, self.error_message(exit_code))
+
+    def process_error(self, error):
+        # A crash is also reported through finished, only a failed start is not
+        if error == QProcess.FailedToStart:
+            self.steps = []
+            self.finished.emit(self.name, False, "Could not start git, is it installed?")
+
+def mirror_refresh_steps(url, mirror_cache, end, refresh=True):
+    """GitJob steps that create or refresh the mirror of url, empty if it exists and refresh is off"""
+    if not refresh and mirror_cache.has_mirror(url):
+        return []
+    # A stale mirror is still better than no install when upstream is unreachable
+    refresh_optional = mirror_cache.has_mirror(url)
+    return [(args, 0, end, refresh_optional) for args in mirror_cache.update_commands(url)]
+
+def plugin_clone_job(name, url, target_dir, mirror_cache=None, parent=None, refresh_mirror=True, commit=None):
+    """Create the GitJob that clones a plugin, through the shared mirror cache if given, and checks out commit"""
+    if mirror_cache is None:
+        steps = [(["clone", "--progress", url, target_dir], 0, 100, False)]
+    else:
+        steps = mirror_refresh_steps(url, mirror_cache, 80, refresh_mirror)
+        steps += [(args, 80, 100, False) for args in mirror_cache.clone_commands(url, target_dir)]
+    if commit:
+        steps.append((["-C", target_dir, "checkout", "-q", "--detach", commit], 100, 100, False))
+    return GitJob(name, steps, parent)
+
+def plugin_offline_job(name, url, target_dir, commit, source, parent=None, checkout=True):
+    """Create the GitJob that fetches a pinned plugin commit from a bundle or directory instead of upstream
+
+    Without checkout only the commit is fetched into an existing checkout,
+    plugin_apply_update_job moves it there.
+    """
+    repository, refspec = source_fetch(source, name, url, commit)
+    steps = []
+    if not is_git_checkout(target_dir):
+        steps.append((["init", "-q", target_dir], 0, 0, False))
+        steps.append((["-C", target_dir, "remote", "add", "origin", url], 0, 0, False))
+    steps.append((["-C", target_dir, "fetch", "--progress", "--no-tags", repository, refspec], 0, 100, False))
+    if checkout:
+        steps.append((["-C", target_dir, "checkout", "-q", "--detach", commit], 100, 100, False))
+    return GitJob(name, steps, parent)
+
+def git_output(args):
+    """Run a quick local git command and return its stripped output, None if it fails"""
+    result = subprocess.run(["git"] + args, capture_output=True, text=True)
+    return result.stdout.strip() if result.returncode == 0 else None
+
+def is_git_checkout(path):
+    # Checked explicitly, `git -C` would otherwise happily walk up into the project's own repository
+    return os.path.exists(os.path.join(path, ".git"))
+
+def plugin_fetch_job(name, url, target_dir, mirror_cache=None, parent=None, refresh_mirror=True):
+    """Create the GitJob that fetches upstream commits into an existing plugin checkout"""
+    if mirror_cache is None:
+        return GitJob(name, [(["-C", target_dir, "fetch", "--progress", "origin"], 0, 100, False)], parent)
+    steps = mirror_refresh_steps(url, mirror_cache, 80, refresh_mirror)
+    steps.append((["-C", target_dir, "fetch", "--progress", mirror_cache.mirror_path(url),
+                   "+refs/heads/*:refs/remotes/origin/*"], 80, 100, False))
+    return GitJob(name, steps, parent)
+
+def ensure_remote_head(target_dir, repository):
+    """Point origin/HEAD at the default branch of repository when the checkout has none
+
+    Plugins installed from a bundle or directory start without it and
+    plugin_update_status compares against it. Run after fetching from upstream.
+    """
+    if git_output(["-C", target_dir, "rev-parse", "--verify", "-q", "refs/remotes/origin/HEAD"]):
+        return
+    for line in (git_output(["ls-remote", "--symref", repository, "HEAD"]) or "").splitlines():
+        ref, _, name = line.partition("\t")
+        if name == "HEAD" and ref.startswith("ref: refs/heads/"):
+            git_output(["-C", target_dir, "remote", "set-head", "origin", ref[len("ref: refs/heads/"):]])
+            return
+
+def plugin_update_status(target_dir, pinned=None):
+    """Compare a fetched plugin checkout with the upstream default branch, or with the pinned commit
+
+    Returns a dict with the old and new SHA (new is None when no upstream ref is
+    known or the pinned commit was not fetched), the number of new commits,
+    whether a fast-forward is possible and whether tracked files have local
+    modifications.
+    """
+    old = git_output(["-C", target_dir, "rev-parse", "HEAD"])
+    if pinned:
+        new = git_output(["-C", target_dir, "rev-parse", "--verify", "-q", f"{pinned}^{{commit}}"])
+    else:
+        new = (git_output(["-C", target_dir, "rev-parse", "--verify", "-q", "refs/remotes/origin/HEAD"]) or
+               git_output(["-C", target_dir, "rev-parse", "--verify", "-q", "@{upstream}"]))
+    status = {"old": old, "new": new, "commits": 0, "fast_forward": True, "dirty": False}
+    if not old or not new or old == new:
+        return status
+    status["commits"] = int(git_output(["-C", target_dir, "rev-list", "--count", f"{old}..{new}"]) or 0)
+    status["fast_forward"] = subprocess.run(
+        ["git", "-C", target_dir, "merge-base", "--is-ancestor", old, new]).returncode == 0
+    status["dirty"] = bool(git_output(["-C", target_dir, "status", "--porcelain", "--untracked-files=no"]))
+    return status
+
+def has_local_changes(target_dir):
+    """Whether a checkout's tracked files or its Source directory differ from HEAD, True if git cannot tell"""
+    tracked = git_output(["-C", target_dir, "status", "--porcelain", "--untracked-files=no"])
+    sources = git_output(["-C", target_dir, "status", "--porcelain", "--", "Source"])
+    return tracked is None or sources is None or bool(tracked or sources)
+
+def plugin_apply_update_job(name, target_dir, sha, hard_reset=False, parent=None):
+    """Create the GitJob that moves a plugin checkout to sha, leaving untracked build outputs alone"""
+    args = ["reset", "--hard", sha] if hard_reset else ["merge", "--ff-only", sha]
+    return GitJob(name, [(["-C", target_dir] + args, 0, 100, False)], parent)
+
+def project_name(project_path):
+    return os.path.basename(project_path).replace('.uproject', '')
+
+def target_name(project_path, target):
+    """UnrealBuildTool target of the project for a target type, e.g. MyProjectEditor for Editor"""
+    return project_name(project_path) + TARGET_SUFFIXES[target]
+
+def has_target(project_path, target):
+    """Whether the project defines the target, projects only get Editor and Game targets by default"""
+    return os.path.exists(os.path.join(os.path.dirname(project_path), "Source",
+                                       f"{target_name(project_path, target)}.Target.cs"))
+
+def check_cpp_support(project_path):
+    """Check if the project has a C++ module named after the project"""
+    project_data = load_uproject(project_path).read()
+    name = project_name(project_path)
+    return any(module.get("Name") == name for module in project_data.get("Modules", []))
+
+def validate_project(project_path):
+    """Return a list of problems that prevent the project from being set up"""
+    if not project_path.endswith(".uproject") or not os.path.isfile(project_path):
+        return [f"Not an Unreal project file: {project_path}"]
+    
+    problems = []
+    if ' ' in project_path:
+        problems.append("Project path contains spaces which may cause compilation issues")
+    try:
+        if not check_cpp_support(project_path):
+            problems.append("This appears to be a Blueprint-only project, C++ support is required")
+    except Exception as e:
+        problems.append(f"Error checking C++ support: {str(e)}")
+    return problems
+
+def update_uproject_file(project_path):
+    """Enable the ROSUE plugins in the .uproject, returns the names of the plugins that were not enabled yet
+
+    Entries keep their position, the file is only written when a plugin had to be added or enabled.
+    """
+    required_plugins = [name for _, name in ROSUE_PLUGINS]
+    changed = []
+    with load_uproject(project_path).edit() as project_data:
+        plugins = project_data.setdefault("Plugins", [])
+        for name in required_plugins:
+            entries = [p for p in plugins if p.get("Name") == name]
+            if not entries:
+                plugins.append({"Name": name, "Enabled": True})
+                changed.append(name)
+                continue
+            # Duplicates would leave it to Unreal which of the entries wins
+            for duplicate in entries[1:]:
+                plugins.remove(duplicate)
+            if entries[0].get("Enabled") is not True or len(entries) > 1:
+                entries[0]["Enabled"] = True
+                changed.append(name)
+    return changed
+
+def uproject_has_plugins(project_path):
+    """Whether the .uproject already enables every ROSUE plugin"""
+    try:
+        project_data = load_uproject(project_path).read()
+    except (OSError, ValueError):
+        return False
+    enabled = {p.get("Name") for p in project_data.get("Plugins", []) if p.get("Enabled")}
+    return all(name in enabled for _, name in ROSUE_PLUGINS)
+
+def remove_plugins(project_path):
+    """Remove the ROSUE plugin directories and .uproject entries
+
+    Returns the removed directory names and the number of removed entries.
+    """
+    plugins_dir = os.path.join(os.path.dirname(project_path), "Plugins")
+    plugins_to_remove = [name for _, name in ROSUE_PLUGINS]
+    removed_dirs = []
+    for name in plugins_to_remove:
+        plugin_path = os.path.join(plugins_dir, name)
+        if os.path.exists(plugin_path):
+            shutil.rmtree(plugin_path)
+            removed_dirs.append(name)
+    
+    removed_count = 0
+    with load_uproject(project_path).edit() as project_data:
+        if "Plugins" in project_data:
+            original_count = len(project_data["Plugins"])
+            project_data["Plugins"] = [p for p in project_data["Plugins"]
+                                       if p.get("Name") not in plugins_to_remove]
+            removed_count = original_count - len(project_data["Plugins"])
+    return removed_dirs, removed_count
+
+def find_build_script(engine_path):
+    """Locate Build.sh of the given engine"""
+    if not engine_path:
+        raise Exception("No Unreal Engine selected for the project!")
+    build_script = os.path.join(engine_path, BUILD_SCRIPT)
+    if not os.path.exists(build_script):
+        raise Exception(f"Could not find Build.sh script at {build_script}!")
+    return build_script
+
+class ProjectSetup(QObject):
+    """Set up one Unreal project: install the plugins, patch the .uproject and build it
+
+    Steps run asynchronously on the Qt event loop and report through signals,
+    so the same object drives the GUI and the headless batch mode.
+    """
+    log = pyqtSignal(str, bool)
+    # Complete lines of build output, emitted in batches as they arrive
+    output = pyqtSignal(object, bool)
+    progress = pyqtSignal(int)
+    # Completed and total UBT actions and the estimated seconds left (-1 if unknown)
+    build_progress = pyqtSignal(int, int, float)
+    plugin_job_started = pyqtSignal(str)
+    plugin_job_progress = pyqtSignal(str, int)
+    plugin_jobs_finished = pyqtSignal()
+    step_finished = pyqtSignal(str, bool, str)
+    finished = pyqtSignal(bool)
+    # Emitted by the binary cache worker thread, delivered on the event loop
+    binary_cache_done = pyqtSignal(str, object)
+
+    STEPS = ["validate", "plugins", "update", "compile"]
+    # Steps each step waits for, as far as they are part of the run; everything else overlaps
+    DEPENDENCIES = {
+        "validate": [],
+        "engine": [],
+        "clear": ["validate"],
+        "plugins": ["validate"],
+        "update": ["validate"],
+        "compile": ["engine", "clear", "plugins", "update"]
+    }
+    STEP_METHODS = {
+        "validate": "validate_project",
+        "engine": "validate_engine",
+        "clear": "clear_project_cache",
+        "plugins": "install_plugins",
+        "update": "update_uproject_file",
+        "compile": "compile_project"
+    }
+
+    def __init__(self, project_path, engine_path, parent=None):
+        super().__init__(parent)
+        self.project_path = project_path
+        self.engine_path = engine_path
+        self.mirror_cache = MirrorCache()
+        self.use_mirror_cache = True
+        self.refresh_mirrors = True
+        self.clear_cache = False
+        # "all", "game" or "plugins", the latter limited to cache_plugins when it is not empty
+        self.cache_scope = "all"
+        self.cache_plugins = []
+        # Build even when the fingerprint manifest says nothing changed
+        self.force_build = False
+        # Target type (see TARGET_SUFFIXES), configuration and extra UnrealBuildTool arguments of the build
+        self.build_target = "Editor"
+        self.build_configuration = "Development"
+        self.build_arguments = []
+        self.build_state = None
+        self.build_command = None
+        # Prebuilt plugin outputs shared between projects, see binary_cache
+        self.binary_cache = BinaryCache()
+        self.use_binary_cache = True
+        self.binary_keys = {}
+        # (target type, platform, configuration) the binary_keys are for
+        self.binary_config = None
+        self.binary_cache_stats = None
+        # -MaxParallelActions for UBT, None chooses it from the cores and the available memory
+        self.max_parallel_actions = None
+        self.parallel_actions = None
+        self.build_memory = None
+        self.memory_error = False
+        self.compile_error = False
+        self.memory_timer = QTimer(self)
+        self.memory_timer.setInterval(1000)
+        self.memory_timer.timeout.connect(self.sample_memory)
+        # "ccache", "sccache" or "auto" to route compiles through a compiler cache, None to compile directly
+        self.compiler_cache = None
+        self.compiler_cache_dir = None
+        self.build_environment = {}
+        self.compiler_cache_tool = None
+        self.compiler_cache_before = None
+        self.compiler_cache_stats = None
+        # How to treat installed plugins ("skip", "update" or "reinstall", None to skip pinned ones and update
+        # the others, see plugins_policy) and how to apply updates ("fast-forward", "reset" or None),
+        # the GUI replaces the ask methods with dialogs
+        self.existing_plugins_policy = "skip"
+        self.update_mode = "fast-forward"
+        # Plugins are installed at the commits pinned in the project's lockfile, see plugin_lock.
+        # Updating moves them to upstream and pins the new commits, only plugin_source updates stay
+        # at the pins. plugin_source is a bundle or directory to install them from without network access.
+        self.plugin_source = None
+        self.lock_plugins = True
+        self.plugin_pins = None
+        # Skip plugins and update when their results are already in place, see outputs_valid
+        self.skip_valid_steps = False
+
+        # Every run is appended to the telemetry history, see run_record
+        self.history = History()
+        self.record_history = True
+        self.run_record = None
+        self.run_started_at = 0
+        self.run_cpu = 0
+        self.step_cpu = {}
+        self.step_peaks = {}
+        self.plugin_bytes = {"received": 0, "cloned": 0}
+        self.deletions_pending = 0
+        self.bytes_deleted = 0
+        self.telemetry_timer = QTimer(self)
+        self.telemetry_timer.setInterval(500)
+        self.telemetry_timer.timeout.connect(self.sample_children)
+
+        self.waiting_steps = []
+        self.running_steps = {}
+        self.run_steps = []
+        self.run_started = 0
+        self.run_failed = False
+        self.cancelled = False
+        self.scheduling = False
+        self.reschedule = False
+        self.progress_value = 0
+        self.step_results = {}
+        self.plugin_jobs = {}
+        self.plugin_job_actions = {}
+        self.plugin_job_failures = []
+        self.plugin_jobs_done = None
+        self.updating_plugins = []
+        # Where each updated plugin is fetched from upstream, see ensure_remote_head
+        self.plugin_fetch_sources = {}
+
+        self.stdout_decoder = LineDecoder()
+        self.stderr_decoder = LineDecoder()
+        self.build_parser = None
+        self.build_percent = -1
+        self.deleter = BackgroundDeleter(parent=self)
+        self.deleter.finished.connect(self.cache_deleted)
+        self.binary_cache_done.connect(self.binary_cache_finished)
+        self.process = QProcess(self)
+        self.process.readyReadStandardOutput.connect(self.handle_stdout)
+        self.process.readyReadStandardError.connect(self.handle_stderr)
+        self.process.finished.connect(self.process_finished)
+        self.process.errorOccurred.connect(self.process_error)
+
+    @property
+    def project_dir(self):
+        return os.path.dirname(self.project_path)
+
+    @property
+    def plugins_dir(self):
+        return os.path.join(self.project_dir, "Plugins")
+
+    @property
+    def running(self):
+        return bool(self.running_steps or self.waiting_steps)
+
+    def log_message(self, message, error=False):
+        self.log.emit(message, error)
+
+    def set_progress(self, value):
+        # Overlapping steps report their own ranges, the bar only moves forward
+        if value > self.progress_value and not self.run_failed:
+            self.progress_value = value
+            self.progress.emit(value)
+
+    def plan(self, steps):
+        """The steps of a run: compile brings engine validation and, if enabled, the cache clear"""
+        planned = list(steps)
+        if "compile" in planned:
+            planned[planned.index("compile"):planned.index("compile")] = [
+                step for step in (["engine"] + (["clear"] if self.clear_cache else []))
+                if step not in planned]
+        return planned
+
+    def run(self, steps, skip_valid=None):
+        """Run the given steps, each as soon as the steps it depends on succeeded
+
+        Stops starting new steps at the first failure, steps already running
+        are allowed to finish.
+        """
+        if self.running:
+            self.log_message(f"Cannot start, {', '.join(self.running_steps) or 'a step'} is still running",
+                             error=True)
+            return False
+        if skip_valid is not None:
+            self.skip_valid_steps = skip_valid
+        # A record still waiting for its background deletion is written as it is
+        self.write_run_record(force=True)
+        self.run_steps = self.plan(steps)
+        self.waiting_steps = list(self.run_steps)
+        self.run_started = time.monotonic()
+        self.run_started_at = time.time()
+        self.run_cpu = children_cpu()
+        self.plugin_bytes = {"received": 0, "cloned": 0}
+        self.bytes_deleted = 0
+        self.run_failed = False
+        self.cancelled = False
+        self.progress_value = 0
+        self.step_results = {}
+        self.binary_cache_stats = None
+        self.build_memory = None
+        self.compiler_cache_stats = None
+        self.schedule()
+        return True
+
+    def dependencies_met(self, step):
+        return all(self.step_results.get(dependency, {}).get("status") in ("success", "skipped")
+                   for dependency in self.DEPENDENCIES[step] if dependency in self.run_steps)
+
+    def schedule(self):
+        """Start every waiting step whose dependencies are done, finish the run when nothing is left"""
+        # Synchronous steps finish inside start_step and call back here, the outer loop picks that up
+        if self.scheduling:
+            self.reschedule = True
+            return
+        self.scheduling = True
+        try:
+            self.reschedule = True
+            while self.reschedule and not self.run_failed:
+                self.reschedule = False
+                for step in [step for step in self.waiting_steps if self.dependencies_met(step)]:
+                    if self.run_failed:
+                        break
+                    self.waiting_steps.remove(step)
+                    self.start_step(step)
+        finally:
+            self.scheduling = False
+        if self.run_failed:
+            self.waiting_steps = []
+        if not self.running_steps and not self.waiting_steps and self.run_steps:
+            self.finish_run()
+
+    def start_step(self, step):
+        self.running_steps[step] = time.monotonic()
+        self.step_cpu[step] = children_cpu()
+        self.step_peaks[step] = 0
+        self.telemetry_timer.start()
+        reason = self.outputs_valid(step) if self.skip_valid_steps else ""
+        if reason:
+            self.log_message(f"Skipping {step}: {reason}")
+            self.step_done(step, True, note=reason)
+            return
+        try:
+            getattr(self, self.STEP_METHODS[step])()
+        except Exception as e:
+            self.step_done(step, False, str(e))
+
+    def outputs_valid(self, step):
+        """Why the step's result is already in place, "" if it has to run"""
+        if step == "plugins" and self.plugins_policy() == "skip":
+            targets = [os.path.join(self.plugins_dir, name) for _, name in ROSUE_PLUGINS]
+            # A checkout without a HEAD is left over from an interrupted clone
+            if all(is_git_checkout(target) and git_output(["-C", target, "rev-parse", "HEAD"])
+                   for target in targets):
+                try:
+                    pins = read_lock(self.project_path)
+                except Exception:
+                    # Reported when the step runs
+                    return ""
+                if pins is None or not mismatched_pins(self.plugins_dir, pins):
+                    return "all plugins are already installed"
+        elif step == "update" and uproject_has_plugins(self.project_path):
+            return "the project file already enables all plugins"
+        return ""
+
+    def step_done(self, step, success, error="", note=""):
+        """Finish a running step, called once by every step whether it is synchronous or not"""
+        started = self.running_steps.pop(step, None)
+        if started is None:
+            return
+        self.step_results[step] = {
+            "status": ("skipped" if note else "success") if success else "failed",
+            "started": round(started - self.run_started, 3),
+            "seconds": round(time.monotonic() - started, 3)
+        }
+        self.record_step_usage(step)
+        if note:
+            self.step_results[step]["note"] = note
+        if error:
+            self.step_results[step]["error"] = error
+            self.log_message(f"Error during {step}: {error}", error=True)
+        if not success and not self.run_failed:
+            self.run_failed = True
+            self.progress_value = 0
+            self.progress.emit(0)
+        self.step_finished.emit(step, success, error)
+        self.schedule()
+
+    def sample_children(self):
+        """Attribute the memory of all child processes to every running step"""
+        if not self.running_steps:
+            self.telemetry_timer.stop()
+            return
+        used = children_rss()
+        for step in self.running_steps:
+            self.step_peaks[step] = max(self.step_peaks.get(step, 0), used)
+
+    def record_step_usage(self, step):
+        """Add CPU time, peak memory and transferred bytes to the step's result
+
+        Child processes are not told apart, steps that overlap share their CPU
+        time and memory.
+        """
+        result = self.step_results[step]
+        result["cpu_seconds"] = round(children_cpu() - self.step_cpu.pop(step, children_cpu()), 3)
+        peak = self.step_peaks.pop(step, 0)
+        if step == "compile" and self.build_memory:
+            peak = max(peak, self.build_memory["peak_rss"])
+        if peak:
+            result["peak_rss"] = peak
+        if step == "plugins":
+            result["bytes_received"] = self.plugin_bytes["received"]
+            result["bytes_cloned"] = self.plugin_bytes["cloned"]
+        if not self.running_steps:
+            self.telemetry_timer.stop()
+
+    def run_id(self):
+        """Readable id of the run, the hash tells runs of same-named projects started in the same second apart"""
+        started = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.run_started_at))
+        digest = hashlib.sha1(f"{os.path.abspath(self.project_path)}\0{self.run_started_at!r}\0{os.getpid()}"
+                              .encode()).hexdigest()[:6]
+        return f"{started}-{project_name(self.project_path)}-{digest}"
+
+    def build_run_record(self):
+        """The run's summary with the telemetry the history keeps"""
+        record = self.summary()
+        record.update({
+            "id": self.run_id(),
+            "started_at": round(self.run_started_at, 3),
+            "cpu_seconds": round(children_cpu() - self.run_cpu, 3)
+        })
+        parser = self.build_parser
+        if parser and parser.first_action is not None and "compile" in self.step_results:
+            record["build"] = {
+                "started": round(parser.started - self.run_started, 3),
+                "first_action": round(parser.first_action - self.run_started, 3),
+                "last_action": round(parser.last_action - self.run_started, 3),
+                "verbs": {verb: round(seconds, 3) for verb, seconds in parser.verb_times().items()}
+            }
+        return record
+
+    def write_run_record(self, force=False):
+        """Append the finished run to the history once its cache deletion reported the bytes it freed"""
+        if self.run_record is None or (self.deletions_pending and not force):
+            return
+        record, self.run_record = self.run_record, None
+        if "clear" in record["steps"]:
+            record["steps"]["clear"]["bytes_deleted"] = self.bytes_deleted
+            if self.deletions_pending:
+                record["steps"]["clear"]["deletion_pending"] = True
+        try:
+            self.history.append(record)
+        except OSError as e:
+            self.log_message(f"Could not write the run history: {str(e)}", error=True)
+
+    def finish_run(self):
+        steps, self.run_steps = self.run_steps, []
+        if self.record_history:
+            self.run_record = self.build_run_record()
+            self.write_run_record()
+        if len(steps) > 1:
+            timings = ", ".join(f"{step} {self.step_results[step]['seconds']:.1f}s"
+                                for step in steps if step in self.step_results)
+            busy = sum(result["seconds"] for result in self.step_results.values())
+            self.log_message(f"Finished in {time.monotonic() - self.run_started:.1f}s "
+                             f"({busy:.1f}s of step time): {timings}")
+        self.finished.emit(not self.run_failed)
+
+    def abort(self):
+        """Cancel the run: kill whatever is running and fail the running steps"""
+        self.cancelled = self.running
+        self.waiting_steps = []
+        for job in list(self.plugin_jobs.values()):
+            job.abort()
+        self.memory_timer.stop()
+        if self.process.state() != QProcess.NotRunning:
+            kill_tree(self.process.processId())
+        for step in list(self.running_steps):
+            self.step_done(step, False, "Cancelled")
+
+    def validate_project(self):
+        problems = validate_project(self.project_path)
+        if problems:
+            raise Exception("; ".join(problems))
+        self.log_message("Project validated, C++ support detected")
+        self.step_done("validate", True)
+
+    def install_plugins(self):
+        self.log_message("Starting plugin installation...")
+        self.set_progress(10)
+        plugins_dir = self.plugins_dir
+        os.makedirs(plugins_dir, exist_ok=True)
+
+        self.plugin_pins = read_lock(self.project_path)
+        if self.plugin_pins is not None:
+            missing = [name for _, name in ROSUE_PLUGINS if name not in self.plugin_pins]
+            if missing:
+                raise Exception(f"{lock_path(self.project_path)} does not pin {', '.join(missing)}")
+            self.log_message(f"Installing the commits pinned in {lock_path(self.project_path)}")
+        if self.plugin_source:
+            if self.plugin_pins is None:
+                raise Exception("Installing from a bundle or directory needs the project's plugin lockfile")
+            check_source(self.plugin_source, self.plugin_pins)
+            self.log_message(f"Installing plugins from {self.plugin_source}, no network access needed")
+
+        existing_plugins = []
+        for _, name in ROSUE_PLUGINS:
+            if os.path.exists(os.path.join(plugins_dir, name)):
+                existing_plugins.append(name)
+        
+        self.updating_plugins = []
+        self.plugin_fetch_sources = {}
+        if existing_plugins:
+            choice = self.ask_existing_plugins(existing_plugins)
+            if choice == "reinstall":
+                for name in existing_plugins:
+                    self.log_message(f"Removing existing plugin: {name}")
+                    shutil.rmtree(os.path.join(plugins_dir, name))
+            elif choice == "update":
+                self.updating_plugins = existing_plugins
+            elif choice == "skip":
+                self.log_message(f"Keeping installed plugins: {', '.join(existing_plugins)}")
+                if self.plugin_pins is not None:
+                    for name, head in mismatched_pins(plugins_dir, self.plugin_pins).items():
+                        self.log_message(f"{name} is at {(head or 'an unknown commit')[:8]}, the lockfile pins "
+                                         f"{self.plugin_pins[name]['commit'][:8]}, reinstall it to match", error=True)
+            else:
+                self.log_message("Plugin installation skipped")
+                self.plugins_finished(True)
+                return
+
+        # Fetch updates and clone missing plugins all at once, they finish in plugin_job_finished.
+        # Clones are held to the pins, updates from upstream move past them and are pinned afterwards.
+        mirror_cache = self.mirror_cache if self.use_mirror_cache and not self.plugin_source else None
+        jobs = []
+        for url, name in ROSUE_PLUGINS:
+            target_dir = os.path.join(plugins_dir, name)
+            pin = self.plugin_pins[name] if self.plugin_pins is not None else None
+            if pin:
+                url = pin["url"]
+            if name in self.updating_plugins:
+                if not is_git_checkout(target_dir):
+                    raise Exception(f"{name} is not a git checkout and cannot be updated, reinstall it instead")
+                if self.plugin_source:
+                    self.log_message(f"Fetching {name} {pin['commit'][:8]} from {self.plugin_source}...")
+                    jobs.append(("fetch", plugin_offline_job(name, url, target_dir, pin["commit"], self.plugin_source,
+                                                             self, checkout=False)))
+                else:
+                    self.log_message(f"Fetching updates for {name}...")
+                    self.plugin_fetch_sources[name] = mirror_cache.mirror_path(url) if mirror_cache else url
+                    jobs.append(("fetch", plugin_fetch_job(name, url, target_dir, mirror_cache, self,
+                                                           self.refresh_mirrors)))
+            elif not os.path.exists(target_dir):
+                if self.plugin_source:
+                    self.log_message(f"Installing {name} {pin['commit'][:8]} from {self.plugin_source}...")
+                    jobs.append(("clone", plugin_offline_job(name, url, target_dir, pin["commit"],
+                                                             self.plugin_source, self)))
+                    continue
+                if mirror_cache and mirror_cache.has_mirror(url):
+                    self.log_message(f"Cloning {name} from local mirror...")
+                else:
+                    self.log_message(f"Cloning {name}...")
+                jobs.append(("clone", plugin_clone_job(name, url, target_dir, mirror_cache, self,
+                                                       self.refresh_mirrors, pin["commit"] if pin else None)))
+
+        done = self.plugin_fetches_finished if self.updating_plugins else self.plugin_clones_finished
+        self.run_plugin_jobs(jobs, done)
+
+    def ask_existing_plugins(self, existing_plugins):
+        """Decide how to handle installed plugins
+
+        Returns "update", "reinstall", "skip" to keep them but still clone the
+        missing ones, or anything else to skip the whole step.
+        """
+        return self.plugins_policy()
+
+    def plugins_policy(self):
+        """existing_plugins_policy, a project with a plugin lockfile keeps its pins unless told otherwise"""
+        if self.existing_plugins_policy is not None:
+            return self.existing_plugins_policy
+        return "skip" if os.path.exists(lock_path(self.project_path)) else "update"
+
+    def confirm_plugin_updates(self, changes):
+        """Decide how to apply the pending plugin changes, returns "fast-forward", "reset" or None"""
+        return self.update_mode
+
+    def run_plugin_jobs(self, jobs, done):
+        """Start (action, GitJob) pairs concurrently and call done once all of them finished"""
+        self.plugin_job_failures = []
+        self.plugin_jobs_done = done
+        for action, job in jobs:
+            job.progress.connect(self.plugin_job_progressed)
+            job.warning.connect(self.plugin_job_warning)
+            job.finished.connect(self.plugin_job_finished)
+            self.plugin_jobs[job.name] = job
+            self.plugin_job_actions[job.name] = action
+            self.plugin_job_started.emit(job.name)
+
+        if not self.plugin_jobs:
+            done()
+            return
+
+        for job in list(self.plugin_jobs.values()):
+            job.start()
+
+    def plugin_job_progressed(self, name, percent):
+        self.plugin_job_progress.emit(name, percent)
+        # Overall progress covers 10-30 while cloning, driven by the average of all jobs
+        jobs = self.plugin_jobs.values()
+        average = sum(job.percent for job in jobs) // max(len(jobs), 1)
+        self.set_progress(10 + average * 20 // 100)
+
+    def plugin_job_warning(self, name, message):
+        self.log_message(f"Could not refresh the mirror of {name}, using the cached copy: {message}", error=True)
+
+    def plugin_job_finished(self, name, success, message):
+        job = self.plugin_jobs.pop(name, None)
+        if job:
+            job.deleteLater()
+        action = self.plugin_job_actions.pop(name, "clone")
+        if job:
+            self.plugin_bytes["received"] += job.received_bytes + job.step_received
+        if success and action == "clone":
+            self.plugin_bytes["cloned"] += directory_size(os.path.join(self.plugins_dir, name))
+        pinned_action = action == "clone" or (action == "update" and self.plugin_source)
+        if success and pinned_action and self.plugin_pins is not None:
+            # git checked every object it received, what is left is that the checkout ended up at the pin
+            head = git_output(["-C", os.path.join(self.plugins_dir, name), "rev-parse", "HEAD"])
+            if head != self.plugin_pins[name]["commit"]:
+                success = False
+                message = (f"checked out {(head or 'nothing')[:8]} instead of the pinned "
+                           f"{self.plugin_pins[name]['commit'][:8]}")
+        if success:
+            done = {"clone": "Cloned", "fetch": "Fetched", "update": "Updated"}[action]
+            self.log_message(f"{done} {name}")
+        else:
+            self.log_message(f"Failed to {action} {name}: {message}", error=True)
+            self.plugin_job_failures.append(name)
+            if action == "clone":
+                # Do not leave a half cloned plugin behind to be mistaken for an installed one
+                shutil.rmtree(os.path.join(self.plugins_dir, name), ignore_errors=True)
+
+        if not self.plugin_jobs:
+            self.plugin_jobs_finished.emit()
+            if "plugins" in self.running_steps:
+                self.plugin_jobs_done()
+
+    def plugin_clones_finished(self):
+        self.plugins_finished(not self.plugin_job_failures)
+
+    def plugin_fetches_finished(self):
+        """Work out which fetched plugins changed and update them after confirmation"""
+        if self.plugin_job_failures:
+            self.plugins_finished(False)
+            return
+
+        changes = {}
+        for name in self.updating_plugins:
+            # Offline sources only hold the pinned commits, upstream updates go to the default branch
+            pinned = self.plugin_pins[name]["commit"] if self.plugin_source else None
+            if name in self.plugin_fetch_sources:
+                ensure_remote_head(os.path.join(self.plugins_dir, name), self.plugin_fetch_sources[name])
+            status = plugin_update_status(os.path.join(self.plugins_dir, name), pinned)
+            if not status["old"] or not status["new"]:
+                if pinned:
+                    self.log_message(f"The pinned commit {pinned[:8]} of {name} was not found", error=True)
+                else:
+                    self.log_message(f"Cannot determine the upstream version of {name}", error=True)
+                self.plugin_job_failures.append(name)
+            elif status["old"] == status["new"]:
+                self.log_message(f"{name} is up to date ({status['old'][:8]})")
+            else:
+                self.log_message(f"{name}: {status['old'][:8]} → {status['new'][:8]} "
+                                 f"({status['commits']} new commits)")
+                changes[name] = status
+
+        if self.plugin_job_failures:
+            self.plugins_finished(False)
+            return
+        if not changes:
+            self.log_message("All installed plugins are up to date, nothing to rebuild")
+            self.plugins_finished(True)
+            return
+
+        mode = self.confirm_plugin_updates(changes)
+        if mode is None:
+            self.log_message("Plugin update skipped")
+            self.plugins_finished(True)
+            return
+
+        jobs = []
+        for name, status in changes.items():
+            target_dir = os.path.join(self.plugins_dir, name)
+            self.log_message(f"{'Resetting' if mode == 'reset' else 'Fast-forwarding'} {name} "
+                             f"to {status['new'][:8]}...")
+            jobs.append(("update", plugin_apply_update_job(name, target_dir, status["new"],
+                                                           mode == "reset", self)))
+        self.run_plugin_jobs(jobs, self.plugin_clones_finished)
+
+    def plugins_finished(self, success):
+        if self.use_mirror_cache and not self.plugin_source:
+            self.maintain_mirror_cache()
+        if success and self.lock_plugins and (self.plugin_pins is None or
+                                              (self.updating_plugins and not self.plugin_source)):
+            self.write_plugin_lock()
+        if success:
+            self.log_message("Plugin installation completed successfully!")
+            self.set_progress(30)
+            self.step_done("plugins", True)
+        else:
+            self.step_done("plugins", False, f"Failed to install {', '.join(self.plugin_job_failures)}")
+
+    def write_plugin_lock(self):
+        """Pin the installed plugin commits so later installs reproduce them, after an update as well"""
+        try:
+            pins = installed_pins(self.plugins_dir, ROSUE_PLUGINS)
+            if pins == self.plugin_pins:
+                return
+            path = write_lock(self.project_path, pins)
+            pinned = [f"{name} {pin['commit'][:8]}" for name, pin in pins.items()
+                      if self.plugin_pins is None or self.plugin_pins.get(name) != pin]
+            self.plugin_pins = pins
+            self.log_message(f"Pinned {', '.join(pinned)} in {path}")
+        except Exception as e:
+            self.log_message(f"Could not write the plugin lockfile: {str(e)}", error=True)
+
+    def maintain_mirror_cache(self):
+        """Mark the plugin mirrors as used, evict old mirrors and report the cache size"""
+        urls = [url for url, _ in ROSUE_PLUGINS]
+        try:
+            for url in urls:
+                self.mirror_cache.touch(url)
+            for entry in self.mirror_cache.evict(keep=urls):
+                self.log_message(f"Evicted mirror {entry['url'] or entry['path']} ({format_size(entry['size'])})")
+            entries = self.mirror_cache.entries()
+            self.log_message(f"Mirror cache: {len(entries)} mirrors, "
+                             f"{format_size(sum(entry['size'] for entry in entries))}")
+        except OSError as e:
+            self.log_message(f"Error maintaining mirror cache: {str(e)}", error=True)
+
+    def update_uproject_file(self):
+        self.log_message("Updating project file...")
+        self.set_progress(40)
+        changed = update_uproject_file(self.project_path)
+        for plugin in changed:
+            self.log_message(f"Added/Updated plugin: {plugin}")
+        if changed:
+            self.log_message("Project file updated successfully!")
+        else:
+            self.log_message("Project file already enables all plugins, left unchanged")
+        self.set_progress(50)
+        self.step_done("update", True)
+
+    def clear_project_cache(self):
+        """Move the cache directories of the selected scope aside and delete them in the background"""
+        self.log_message(f"Clearing project cache ({self.cache_scope_label()})...")
+        try:
+            targets = cache_targets(self.project_dir, self.cache_scope, self.cache_plugins)
+            for path in targets:
+                self.log_message(f"Removing {os.path.relpath(path, self.project_dir)}")
+            trashed = move_aside(self.project_dir, targets)
+        except Exception as e:
+            # Not fatal, the build then merely reuses what is left
+            self.log_message(f"Error clearing cache: {str(e)}", error=True)
+            self.step_done("clear", True)
+            return
+        if trashed:
+            self.deletions_pending += 1
+            self.deleter.delete(trashed)
+            self.log_message("Cache cleared, old files are deleted in the background")
+        else:
+            self.log_message("Cache is already clear")
+        self.step_done("clear", True)
+
+    def cache_scope_label(self):
+        if self.cache_scope == "plugins" and self.cache_plugins:
+            return f"plugins {', '.join(self.cache_plugins)}"
+        return {"all": "everything", "game": "game module only", "plugins": "all plugins"}[self.cache_scope]
+
+    def cache_deleted(self, reclaimed, count, seconds):
+        self.log_message(f"Background cache deletion finished: reclaimed {format_size(reclaimed)} "
+                         f"from {count} directories in {seconds:.1f}s")
+        self.deletions_pending = max(0, self.deletions_pending - 1)
+        self.bytes_deleted += reclaimed
+        self.write_run_record()
+
+    def validate_engine(self):
+        find_build_script(self.engine_path)
+        build_version = os.path.join(self.engine_path, BUILD_VERSION)
+        version = build_fingerprint.engine_build_version(build_version)
+        if version:
+            self.log_message(f"Using Unreal Engine {version.get('MajorVersion')}.{version.get('MinorVersion')}."
+                             f"{version.get('PatchVersion')} at {self.engine_path}")
+        else:
+            self.log_message(f"Could not read the engine version from {build_version}, "
+                             "rebuilds after an engine upgrade will not be detected", error=True)
+        self.step_done("engine", True)
+
+    def compile_project(self):
+        self.log_message("Starting project compilation...")
+        self.set_progress(60)
+        
+        build_script = find_build_script(self.engine_path)
+        
+        command = [
+            build_script,
+            target_name(self.project_path, self.build_target),
+            "Linux",
+            self.build_configuration,
+            f"-Project={self.project_path}"  # Removed extra quotes that could cause issues
+        ] + self.build_arguments
+
+        reason = self.check_build_needed(build_script, command[1:4])
+        if reason:
+            self.log_message(f"Skipping compilation: {reason}")
+            self.set_progress(100)
+            self.step_done("compile", True, note=reason)
+            return
+        
+        self.build_command = command
+        self.parallel_actions = self.choose_parallel_actions()
+        self.build_memory = {"parallel_actions": self.parallel_actions, "peak_rss": 0, "attempts": []}
+        self.build_environment = self.setup_compiler_cache() if self.compiler_cache else {}
+        self.binary_keys = self.plugin_binary_keys() if self.use_binary_cache else {}
+        if self.binary_keys:
+            # Restoring copies whole directory trees, the build starts in binary_cache_finished
+            self.run_binary_cache(self.restore_plugin_binaries, self.binary_keys)
+        else:
+            self.start_build()
+
+    def choose_parallel_actions(self):
+        if self.max_parallel_actions:
+            self.log_message(f"Using {self.max_parallel_actions} parallel actions as configured")
+            return self.max_parallel_actions
+        cores = os.cpu_count() or 1
+        available = memory_info()["available"]
+        actions = choose_parallel_actions(cores, available)
+        self.log_message(f"Using {actions} parallel actions ({cores} cores, {format_size(available)} available, "
+                         f"{format_size(memory_per_action())} per action)")
+        return actions
+
+    def setup_compiler_cache(self):
+        """Prepare the wrapped toolchain, returns the environment for Build.sh or {} to build without cache"""
+        self.compiler_cache_tool = None
+        tool_path = find_compiler_cache(None if self.compiler_cache == "auto" else self.compiler_cache)
+        if not tool_path:
+            self.log_message(f"Compiler cache {self.compiler_cache} not found, building without it", error=True)
+            return {}
+        toolchain = engine_toolchain(self.engine_path)
+        if not toolchain:
+            self.log_message("No clang toolchain found for the engine, building without compiler cache", error=True)
+            return {}
+        cache_dir = self.compiler_cache_dir or default_compiler_cache_dir()
+        try:
+            wrapper_root = make_wrapper_toolchain(toolchain, tool_path, cache_dir)
+        except OSError as e:
+            self.log_message(f"Could not set up the compiler cache: {str(e)}", error=True)
+            return {}
+        environment = cache_environment(tool_path, cache_dir, self.project_dir)
+        environment["LINUX_MULTIARCH_ROOT"] = wrapper_root
+        self.compiler_cache_tool = tool_path
+        self.compiler_cache_before = read_compiler_cache_stats(tool_path, environment)
+        self.log_message(f"Compiling through {os.path.basename(tool_path)} with cache in {cache_dir}")
+        return environment
+
+    def report_compiler_cache(self):
+        stats = stats_difference(self.compiler_cache_before,
+                                 read_compiler_cache_stats(self.compiler_cache_tool, self.build_environment))
+        if stats is None:
+            self.log_message("Could not read the compiler cache statistics", error=True)
+            return
+        compiles = stats["hits"] + stats["misses"]
+        compile_seconds = sum(seconds for action, seconds in self.build_parser.file_times.items()
+                              if action.startswith("Compile "))
+        saved = estimate_saved(stats, compile_seconds, self.compiler_cache_dir or default_compiler_cache_dir())
+        self.compiler_cache_stats = dict(stats, saved_seconds=None if saved is None else round(saved, 1))
+        rate = f"{100 * stats['hits'] // compiles}% hit rate" if compiles else "no compiles"
+        self.log_message(f"Compiler cache: {stats['hits']} hits, {stats['misses']} misses ({rate})"
+                         + (f", saved about {format_duration(saved)}" if saved else ""))
+
+    def start_build(self):
+        command = self.build_command + [f"-MaxParallelActions={self.parallel_actions}"]
+        build_script = command[0]
+        self.log_message(f"Running command: {' '.join(command)}")
+        
+        # Ensure build script is executable
+        os.chmod(build_script, 0o755)
+        
+        self.stdout_decoder = LineDecoder()
+        self.stderr_decoder = LineDecoder()
+        self.build_parser = UBTProgressParser(SourceIndex(self.project_dir))
+        self.build_percent = -1
+        # Set working directory to UE directory to ensure proper build context
+        self.process.setWorkingDirectory(os.path.dirname(os.path.dirname(os.path.dirname(build_script))))
+        environment = QProcessEnvironment.systemEnvironment()
+        for name, value in self.build_environment.items():
+            environment.insert(name, value)
+        self.process.setProcessEnvironment(environment)
+        self.memory_error = False
+        self.compile_error = False
+        self.build_memory["attempts"].append({"parallel_actions": self.parallel_actions, "peak_rss": 0,
+                                              "min_available": None})
+        self.process.start(command[0], command[1:])
+        self.memory_timer.start()
+
+    def sample_memory(self):
+        """Track the peak memory of the build's process tree and how close the machine came to running out"""
+        pid = self.process.processId()
+        if not pid or not self.build_memory:
+            return
+        attempt = self.build_memory["attempts"][-1]
+        used = tree_rss(pid)
+        memory = memory_info()
+        attempt["peak_rss"] = max(attempt["peak_rss"], used)
+        attempt["low_memory"] = attempt.get("low_memory") or is_low_memory(memory["available"], memory["total"])
+        if attempt["min_available"] is None or memory["available"] < attempt["min_available"]:
+            attempt["min_available"] = memory["available"]
+        self.build_memory["peak_rss"] = max(self.build_memory["peak_rss"], used)
+
+    def check_build_needed(self, build_script, build_config):
+        """Fingerprint the build inputs, returns why the build can be skipped or "" to build"""
+        build_version = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(build_script))),
+                                     "Build.version")
+        previous = build_fingerprint.load_manifest(self.project_dir)
+        self.build_state = build_fingerprint.compute_state(self.project_path, build_version,
+                                                           build_config, previous)
+        if self.force_build:
+            self.log_message("Forced rebuild requested")
+            return ""
+        reasons = build_fingerprint.describe_changes(previous, self.build_state)
+        missing = build_fingerprint.missing_outputs(self.project_dir)
+        if missing:
+            reasons.append(f"build outputs missing: {', '.join(missing)}")
+        if reasons:
+            self.log_message(f"Build needed: {'; '.join(reasons)}")
+            return ""
+        return "nothing changed since the last successful build (use force rebuild to build anyway)"
+
+    def handle_stdout(self):
+        lines = self.stdout_decoder.feed(self.process.readAllStandardOutput().data())
+        if lines:
+            self.output.emit(lines, False)
+            self.scan_build_errors(lines)
+            if self.build_parser.feed(lines):
+                self.report_build_progress()
+
+    def report_build_progress(self):
+        parser = self.build_parser
+        eta = parser.eta()
+        self.build_progress.emit(parser.offset + parser.done, parser.offset + parser.total,
+                                 -1 if eta is None else eta)
+        # Compilation covers 60-100 of the overall progress
+        if parser.percent != self.build_percent:
+            self.build_percent = parser.percent
+            self.set_progress(60 + parser.percent * 40 // 100)
+
+    def handle_stderr(self):
+        lines = self.stderr_decoder.feed(self.process.readAllStandardError().data())
+        if lines:
+            self.output.emit(lines, True)
+            self.scan_build_errors(lines)
+
+    def scan_build_errors(self, lines):
+        """Note memory and compile errors in the build output, they decide whether a failure is retried"""
+        self.memory_error = self.memory_error or has_memory_error(lines)
+        self.compile_error = self.compile_error or has_compile_error(lines)
+
+    def process_finished(self, exit_code, exit_status):
+        self.memory_timer.stop()
+        if "compile" not in self.running_steps:
+            return
+        for decoder, error in [(self.stdout_decoder, False), (self.stderr_decoder, True)]:
+            lines = decoder.flush()
+            if lines:
+                self.output.emit(lines, error)
+                self.scan_build_errors(lines)
+                if not error:
+                    self.build_parser.feed(lines)
+        for line in self.build_parser.report():
+            self.log_message(line)
+        attempt = self.build_memory["attempts"][-1]
+        attempt["exit_code"] = exit_code
+        self.log_message(f"Peak build memory {format_size(attempt['peak_rss'])} "
+                         f"with {attempt['parallel_actions']} parallel actions")
+        succeeded = exit_status == QProcess.NormalExit and exit_code == 0
+        killed = exit_status == QProcess.CrashExit or exit_code == 137
+        if (not succeeded and self.parallel_actions > 1
+                and len(self.build_memory["attempts"]) < MAX_BUILD_ATTEMPTS
+                and is_memory_failure(killed, self.memory_error, attempt.get("low_memory", False),
+                                      self.compile_error)):
+            self.parallel_actions = max(1, self.parallel_actions // 2)
+            self.build_memory["parallel_actions"] = self.parallel_actions
+            self.log_message(f"The build ran out of memory, retrying with {self.parallel_actions} parallel actions",
+                             error=True)
+            self.start_build()
+            return
+        if self.compiler_cache_tool:
+            self.report_compiler_cache()
+        if succeeded:
+            try:
+                build_fingerprint.save_manifest(self.project_dir, self.build_state)
+            except OSError as e:
+                self.log_message(f"Could not save the build manifest: {str(e)}", error=True)
+            self.log_message("Compilation completed successfully!")
+            self.set_progress(100)
+            if self.binary_keys:
+                self.run_binary_cache(self.store_plugin_binaries, self.binary_keys)
+            else:
+                self.step_done("compile", True)
+        else:
+            self.log_message("Compilation failed!", error=True)
+            self.step_done("compile", False, f"Build.sh exited with code {exit_code}")
+
+    def plugin_binary_keys(self):
+        """Binary cache key of every ROSUE plugin built from source, by plugin name
+
+        Keys only describe committed sources, plugins with local changes (or
+        depending on a plugin with local changes) are built without the cache.
+        """
+        heads = self.build_state["plugins"]
+        target, platform, configuration = self.build_state["config"]
+        config = self.binary_config = (target_type(target), platform, configuration)
+        modified = {name for _, name in ROSUE_PLUGINS if heads.get(name)
+                    and has_local_changes(os.path.join(self.plugins_dir, name))}
+        keys = {}
+        for _, name in ROSUE_PLUGINS:
+            plugin_dir = os.path.join(self.plugins_dir, name)
+            if not heads.get(name) or not os.path.isdir(os.path.join(plugin_dir, "Source")):
+                continue
+            dependencies = {dependency: heads.get(dependency) for dependency in plugin_dependencies(plugin_dir)}
+            changed = sorted(modified & ({name} | set(dependencies)))
+            if changed:
+                self.log_message(f"{', '.join(changed)} {'has' if len(changed) == 1 else 'have'} local changes, "
+                                 f"building {name} without the binary cache")
+                # Its outputs will no longer match the key they were restored or stored for
+                clear_key_marker(plugin_dir, config)
+                continue
+            keys[name] = cache_key(name, heads[name], self.build_state["engine"], config, dependencies)
+        return keys
+
+    def run_binary_cache(self, work, keys):
+        """Run a binary cache operation on a worker thread, its result arrives in binary_cache_finished"""
+        def run():
+            try:
+                result = work(dict(keys))
+            except Exception as e:
+                result = {"error": str(e)}
+            self.binary_cache_done.emit(work.__name__, result)
+        threading.Thread(target=run, daemon=True).start()
+
+    def restore_plugin_binaries(self, keys):
+        """Copy cached outputs into the plugins whose current outputs belong to another key"""
+        results = {}
+        for name, key in keys.items():
+            plugin_dir = os.path.join(self.plugins_dir, name)
+            if read_key_marker(plugin_dir, self.binary_config) == key:
+                results[name] = {"status": "current"}
+                continue
+            started = time.monotonic()
+            size = self.binary_cache.restore(key, plugin_dir, self.binary_config)
+            results[name] = {"status": "miss"} if size is None else {
+                "status": "hit", "size": size, "seconds": round(time.monotonic() - started, 3)}
+        return {"plugins": results}
+
+    def store_plugin_binaries(self, keys):
+        """Store freshly built plugin outputs and trim the cache to its size limit"""
+        results = {}
+        for name, key in keys.items():
+            plugin_dir = os.path.join(self.plugins_dir, name)
+            if not config_outputs(plugin_dir, self.binary_config):
+                continue
+            size = self.binary_cache.store(key, plugin_dir, self.binary_config,
+                                           {"plugin": name, "commit": self.build_state["plugins"][name],
+                                            "config": self.build_state["config"][1:]})
+            write_key_marker(plugin_dir, self.binary_config, key)
+            if size is not None:
+                results[name] = {"size": size}
+        evicted = self.binary_cache.evict(keep=list(keys.values()))
+        entries = self.binary_cache.entries()
+        return {"stored": results, "evicted": evicted, "entries": len(entries),
+                "size": sum(entry["size"] for entry in entries)}
+
+    def binary_cache_finished(self, operation, result):
+        if "compile" not in self.running_steps:
+            return
+        if "error" in result:
+            self.log_message(f"Binary cache error: {result['error']}", error=True)
+        if operation == "restore_plugin_binaries":
+            for name, plugin in result.get("plugins", {}).items():
+                if plugin["status"] == "hit":
+                    self.log_message(f"Binary cache hit for {name}: restored {format_size(plugin['size'])} "
+                                     f"in {plugin['seconds']:.1f}s")
+                elif plugin["status"] == "miss":
+                    self.log_message(f"Binary cache miss for {name}, it is built from source")
+                else:
+                    self.log_message(f"Binaries of {name} already match its binary cache entry")
+            plugins = result.get("plugins", {}).values()
+            self.binary_cache_stats = {
+                "hits": sum(plugin["status"] == "hit" for plugin in plugins),
+                "misses": sum(plugin["status"] == "miss" for plugin in plugins)
+            }
+            try:
+                self.start_build()
+            except Exception as e:
+                self.step_done("compile", False, str(e))
+        else:
+            for name, stored in result.get("stored", {}).items():
+                self.log_message(f"Stored binaries of {name} in the binary cache ({format_size(stored['size'])})")
+            for entry in result.get("evicted", []):
+                self.log_message(f"Evicted binary cache entry {entry['key']} ({format_size(entry['size'])})")
+            if "entries" in result:
+                self.log_message(f"Binary cache: {result['entries']} entries, {format_size(result['size'])}")
+            self.step_done("compile", True)
+
+    def process_error(self, error):
+        if error == QProcess.FailedToStart and "compile" in self.running_steps:
+            self.step_done("compile", False, "Could not start Build.sh")
+
+    def summary(self):
+        """Machine readable result of the last run"""
+        failed = [step for step, result in self.step_results.items() if result["status"] == "failed"]
+        summary = {
+            "project": self.project_path,
+            "engine": self.engine_path,
+            "status": "failed" if failed else "success",
+            "failed_step": failed[0] if failed else None,
+            "error": self.step_results[failed[0]].get("error") if failed else None,
+            "seconds": round(max((result["started"] + result["seconds"] for result in self.step_results.values()),
+                                 default=0), 3),
+            "steps": self.step_results
+        }
+        if self.build_parser and self.build_parser.done:
+            summary["build_timing"] = self.build_parser.summary()
+        if self.binary_cache_stats:
+            summary["binary_cache"] = self.binary_cache_stats
+        if self.build_memory and self.build_memory["attempts"]:
+            summary["build_memory"] = self.build_memory
+        if self.compiler_cache_stats:
+            summary["compiler_cache"] = self.compiler_cache_stats
+        return summary
+
+class BatchRunner(QObject):
+    """Set up many projects concurrently with at most max_workers of them running at a time
+
+    The plugin mirrors are refreshed once before the projects start so that
+    concurrent installs only read from them.
+    """
+    log = pyqtSignal(str, str, bool)
+    project_finished = pyqtSignal(object)
+    finished = pyqtSignal(object)
+
+    def __init__(self, projects, engine_path, steps=None, max_workers=2, options=None, parent=None):
+        super().__init__(parent)
+        self.projects = list(projects)
+        self.engine_path = engine_path
+        self.steps = steps or ProjectSetup.STEPS
+        self.max_workers = max(1, max_workers)
+        # ProjectSetup attributes applied to every project, e.g. {"clear_cache": True}
+        self.options = options or {}
+        self.mirror_cache = MirrorCache()
+        # Used to pick each project's engine from its EngineAssociation when engine_path is None
+        self.engine_registry = None
+        self.queue = []
+        self.active = {}
+        self.results = {}
+        self.mirror_jobs = []
+        self.running = False
+
+    def start(self):
+        self.queue = list(self.projects)
+        self.running = True
+        if ("plugins" in self.steps and self.options.get("use_mirror_cache", True)
+                and not self.options.get("plugin_source")):
+            self.refresh_mirrors()
+        else:
+            self.start_next_projects()
+
+    def refresh_mirrors(self):
+        for url, name in ROSUE_PLUGINS:
+            job = GitJob(name, mirror_refresh_steps(url, self.mirror_cache, 100), self)
+            job.warning.connect(lambda name, message: self.log.emit(
+                "mirrors", f"Could not refresh the mirror of {name}, using the cached copy: {message}", True))
+            job.finished.connect(self.mirror_refreshed)
+            self.mirror_jobs.append(job)
+            self.log.emit("mirrors", f"Refreshing mirror of {name}...", False)
+        for job in list(self.mirror_jobs):
+            job.start()
+
+    def mirror_refreshed(self, name, success, message):
+        if not success:
+            self.log.emit("mirrors", f"Failed to refresh the mirror of {name}: {message}", True)
+        self.mirror_jobs = [job for job in self.mirror_jobs if job.name != name]
+        if not self.mirror_jobs:
+            self.start_next_projects()
+
+    def start_next_projects(self):
+        while self.queue and len(self.active) < self.max_workers:
+            project_path = self.queue.pop(0)
+            engine_path = project_engine_root(project_path, self.engine_path, self.engine_registry)
+            setup = ProjectSetup(project_path, engine_path, self)
+            for key, value in self.options.items():
+                setattr(setup, key, value)
+            setup.mirror_cache = self.mirror_cache
+            setup.refresh_mirrors = False
+            name = project_name(project_path)
+            setup.log.connect(lambda message, error, name=name: self.log.emit(name, message, error))
+            setup.output.connect(lambda lines, error, name=name: self.log.emit(name, "\n".join(lines), error))
+            setup.finished.connect(lambda success, setup=setup: self.setup_finished(setup))
+            self.active[project_path] = setup
+            self.log.emit(name, f"Starting setup of {project_path}", False)
+            if setup.engine_path:
+                self.log.emit(name, f"Using engine {setup.engine_path}", False)
+            elif "compile" in self.steps:
+                self.log.emit(name, "No installed engine matches the project's EngineAssociation "
+                                    f"'{project_association(project_path)}', pass --engine", True)
+            setup.run(self.steps)
+
+        if not self.queue and not self.active:
+            self.finish()
+
+    def finish(self):
+        # Projects finishing close together each schedule a pass that sees the batch done
+        if self.running:
+            self.running = False
+            self.finished.emit([self.results[path] for path in self.projects])
+
+    def setup_finished(self, setup):
+        result = setup.summary()
+        self.results[setup.project_path] = result
+        self.active.pop(setup.project_path, None)
+        # The process may exit before a background cache deletion reports its bytes
+        setup.write_run_record(force=True)
+        setup.deleteLater()
+        self.project_finished.emit(result)
+        # Let the finished signal unwind before starting more work
+        QTimer.singleShot(0, self.start_next_projects)
+
+    def abort(self):
+        self.queue = []
+        for setup in list(self.active.values()):
+            setup.abort()
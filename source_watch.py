@@ -0,0 +1,226 @@
+import os
+import time
+from PyQt5.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+
+SOURCE_EXTENSIONS = (".h", ".hpp", ".inl", ".c", ".cc", ".cpp", ".ispc", ".cs")
+# Saves usually come as a burst of events (temporary file, rename, attribute change)
+DEBOUNCE_MS = 500
+MAX_LOGGED_FILES = 10
+
+def is_source_file(name):
+    # Editor swap and backup files never influence the build
+    return not name.startswith((".", "#")) and name.endswith(SOURCE_EXTENSIONS)
+
+def watched_roots(project_path):
+    """Source directories of the project and of every plugin in it"""
+    project_dir = os.path.dirname(project_path)
+    roots = [os.path.join(project_dir, "Source")]
+    plugins_dir = os.path.join(project_dir, "Plugins")
+    if os.path.isdir(plugins_dir):
+        roots += [os.path.join(plugins_dir, name, "Source") for name in sorted(os.listdir(plugins_dir))]
+    return [root for root in roots if os.path.isdir(root)]
+
+class SourceWatcher(QObject):
+    """Report changed source files below a set of directories, once a burst of changes settled
+
+    QFileSystemWatcher (inotify on Linux) watches every directory for added,
+    removed and renamed files and every source file for writes in place.
+    changed carries the changed paths and the time.monotonic() of the first
+    change of the burst.
+    """
+    changed = pyqtSignal(list, float)
+
+    def __init__(self, roots, debounce_ms=DEBOUNCE_MS, parent=None):
+        super().__init__(parent)
+        self.roots = list(roots)
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.directory_changed)
+        self.watcher.fileChanged.connect(self.file_changed)
+        # (size, mtime_ns) of every source file, to tell which files of a changed directory changed
+        self.files = {}
+        self.pending = set()
+        self.first_change = None
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(debounce_ms)
+        self.timer.timeout.connect(self.report)
+
+    def start(self):
+        for root in self.roots:
+            self.scan(root, report=False)
+
+    def stop(self):
+        self.timer.stop()
+        for paths in (self.watcher.directories(), self.watcher.files()):
+            if paths:
+                self.watcher.removePaths(paths)
+        self.files = {}
+        self.pending = set()
+        self.first_change = None
+
+    def watched_count(self):
+        return len(self.watcher.directories()) + len(self.watcher.files())
+
+    def scan(self, directory, report=True):
+        """Watch directory and everything below it, new or modified files are reported when report is set"""
+        directories, files = [], []
+        for root, dirs, names in os.walk(directory):
+            directories.append(root)
+            for name in names:
+                if is_source_file(name):
+                    files.append(os.path.join(root, name))
+        watched = set(self.watcher.directories()) | set(self.watcher.files())
+        new_paths = [path for path in directories + files if path not in watched]
+        if new_paths:
+            self.watcher.addPaths(new_paths)
+        for path in files:
+            self.update_file(path, report)
+
+    def update_file(self, path, report=True):
+        try:
+            stat = os.stat(path)
+            signature = (stat.st_size, stat.st_mtime_ns)
+        except OSError:
+            signature = None
+        if self.files.get(path) == signature:
+            return
+        if signature is None:
+            self.files.pop(path, None)
+        else:
+            self.files[path] = signature
+        if report:
+            self.add_change(path)
+
+    def directory_changed(self, directory):
+        if not os.path.isdir(directory):
+            # Removed along with its files, the parent directory reports the change
+            self.forget(directory)
+            return
+        self.scan_directory(directory)
+
+    def scan_directory(self, directory):
+        """Pick up files and subdirectories added, removed or renamed directly in directory"""
+        prefix = directory + os.sep
+        for path in [path for path in self.files if path.startswith(prefix) and os.sep not in path[len(prefix):]]:
+            if not os.path.exists(path):
+                self.forget(path)
+                self.add_change(path)
+        try:
+            entries = os.listdir(directory)
+        except OSError:
+            return
+        for name in entries:
+            path = os.path.join(directory, name)
+            if os.path.isdir(path):
+                if path not in self.watcher.directories():
+                    self.scan(path)
+            elif is_source_file(name):
+                if path not in self.watcher.files():
+                    # Editors that save through a rename replace the watched file with a new one
+                    self.watcher.addPath(path)
+                self.update_file(path)
+
+    def file_changed(self, path):
+        if os.path.exists(path) and path not in self.watcher.files():
+            self.watcher.addPath(path)
+        self.update_file(path)
+
+    def forget(self, path):
+        prefix = path + os.sep
+        for known in [known for known in self.files if known == path or known.startswith(prefix)]:
+            del self.files[known]
+        stale = [watched for watched in self.watcher.directories() + self.watcher.files()
+                 if watched == path or watched.startswith(prefix)]
+        if stale:
+            self.watcher.removePaths(stale)
+
+    def add_change(self, path):
+        if self.first_change is None:
+            self.first_change = time.monotonic()
+        self.pending.add(path)
+        # Every further change restarts the wait, the burst is reported once it is quiet
+        self.timer.start()
+
+    def report(self):
+        paths, first_change = sorted(self.pending), self.first_change
+        self.pending = set()
+        self.first_change = None
+        if paths:
+            self.changed.emit(paths, first_change)
+
+class WatchMode(QObject):
+    """Rebuild a project incrementally whenever its or its plugins' sources change
+
+    Changes that arrive while a build (of watch mode or not) is running are
+    collected and built together once it finished.
+    """
+    build_finished = pyqtSignal(bool, float)
+
+    def __init__(self, setup, debounce_ms=DEBOUNCE_MS, parent=None):
+        super().__init__(parent)
+        self.setup = setup
+        self.watcher = SourceWatcher(watched_roots(setup.project_path), debounce_ms, self)
+        self.watcher.changed.connect(self.sources_changed)
+        self.setup.finished.connect(self.setup_finished)
+        self.active = False
+        self.building = False
+        self.build_since = None
+        self.pending = []
+        self.pending_since = None
+
+    def start(self):
+        self.watcher.start()
+        self.active = True
+        roots = ", ".join(os.path.relpath(root, self.setup.project_dir) for root in self.watcher.roots)
+        self.setup.log_message(f"Watching {self.watcher.watched_count()} files and directories in {roots}")
+
+    def stop(self):
+        self.active = False
+        self.watcher.stop()
+        self.pending = []
+        self.pending_since = None
+        self.setup.log_message("Stopped watching the sources")
+
+    def sources_changed(self, paths, first_change):
+        if not self.active:
+            return
+        self.pending += [path for path in paths if path not in self.pending]
+        if self.pending_since is None or first_change < self.pending_since:
+            self.pending_since = first_change
+        if self.setup.running:
+            self.setup.log_message(f"{len(paths)} source files changed, rebuilding once the current run finished")
+            return
+        self.start_build()
+
+    def start_build(self):
+        paths, self.pending = self.pending, []
+        self.build_since, self.pending_since = self.pending_since, None
+        shown = [os.path.relpath(path, self.setup.project_dir) for path in paths[:MAX_LOGGED_FILES]]
+        if len(paths) > MAX_LOGGED_FILES:
+            shown.append(f"and {len(paths) - MAX_LOGGED_FILES} more")
+        self.setup.log_message(f"Changed: {', '.join(shown)}")
+        # Only the edited sources are rebuilt in place. Their plugins no longer match the commits the
+        # binary cache is keyed by, and clearing the cache would turn the rebuild into a full one.
+        self.setup.clear_cache = False
+        self.setup.use_binary_cache = False
+        # Set first, a build that cannot start finishes before run returns
+        self.building = True
+        if not self.setup.run(["compile"], skip_valid=False):
+            self.building = False
+
+    def setup_finished(self, success):
+        if self.building:
+            self.building = False
+            seconds = time.monotonic() - self.build_since
+            if success:
+                self.setup.log_message(f"Save to built: {seconds:.1f}s")
+            else:
+                self.setup.log_message(f"Rebuild failed, {seconds:.1f}s after the save", error=True)
+            self.build_finished.emit(success, seconds)
+        if self.active and self.pending and not self.setup.running:
+            # Let the finished signal unwind before starting the follow-up build
+            QTimer.singleShot(0, self.start_pending)
+
+    def start_pending(self):
+        if self.active and self.pending and not self.setup.running:
+            self.start_build()
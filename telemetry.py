@@ -0,0 +1,173 @@
+import os
+import sys
+import json
+import time
+import resource
+import statistics
+
+from directory_cache import format_size
+
+MAX_RUNS = 500
+# A step is reported as a regression when it got this much slower than the median of earlier runs
+REGRESSION_RATIO = 1.2
+REGRESSION_SECONDS = 1.0
+
+def default_history_path():
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.environ.get("ROSUE_HISTORY") or os.path.join(cache_home, "rosue", "history.jsonl")
+
+def children_cpu():
+    """CPU seconds used by the child processes that finished so far, grandchildren included"""
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+def parse_git_size(value, unit):
+    """Bytes of a size in git's progress output, e.g. ("12.34", "MiB")"""
+    factor = {"bytes": 1, "KiB": 1024, "MiB": 1024 ** 2, "GiB": 1024 ** 3}.get(unit, 1)
+    return int(float(value) * factor)
+
+class History:
+    """Telemetry of past runs, one JSON object per line, oldest first"""
+
+    def __init__(self, path=None):
+        self.path = path or default_history_path()
+
+    def runs(self, project=None):
+        runs = []
+        try:
+            with open(self.path, 'r') as f:
+                for line in f:
+                    try:
+                        run = json.loads(line)
+                    except ValueError:
+                        continue
+                    if project is None or run.get("project") == project:
+                        runs.append(run)
+        except OSError:
+            pass
+        return runs
+
+    def append(self, record):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(record) + "\n")
+        runs = self.runs()
+        if len(runs) > MAX_RUNS * 1.1:
+            # Trimmed in batches so appending stays cheap
+            with open(self.path + ".tmp", 'w') as f:
+                for run in runs[-MAX_RUNS:]:
+                    f.write(json.dumps(run) + "\n")
+            os.replace(self.path + ".tmp", self.path)
+
+    def find(self, run_id=None):
+        """The run with the given id, the latest one without an id"""
+        runs = self.runs()
+        if run_id is None:
+            return runs[-1] if runs else None
+        return next((run for run in runs if run.get("id") == run_id), None)
+
+def chrome_trace(record):
+    """The run as a Chrome trace (chrome://tracing, ui.perfetto.dev), one row per step"""
+    def us(seconds):
+        return int(seconds * 1000000)
+
+    events = [{"name": "process_name", "ph": "M", "pid": 1, "tid": 0,
+               "args": {"name": f"ROSUE setup of {os.path.basename(record.get('project', ''))}"}}]
+    for lane, (step, result) in enumerate(record.get("steps", {}).items(), 1):
+        events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": lane, "args": {"name": step}})
+        events.append({"name": step, "cat": "step", "ph": "X", "pid": 1, "tid": lane,
+                       "ts": us(result["started"]), "dur": us(result["seconds"]),
+                       "args": {key: value for key, value in result.items() if key not in ("started", "seconds")}})
+        build = record.get("build")
+        if step == "compile" and build:
+            if build.get("first_action") is not None:
+                events.append({"name": "UBT startup", "cat": "build", "ph": "X", "pid": 1, "tid": lane,
+                               "ts": us(build["started"]), "dur": us(build["first_action"] - build["started"])})
+                events.append({"name": "UBT actions", "cat": "build", "ph": "X", "pid": 1, "tid": lane,
+                               "ts": us(build["first_action"]), "dur": us(build["last_action"] - build["first_action"]),
+                               "args": build.get("verbs", {})})
+    return {"traceEvents": events, "displayTimeUnit": "ms",
+            "otherData": {"project": record.get("project"), "status": record.get("status"), "id": record.get("id")}}
+
+def write_chrome_trace(record, path):
+    with open(path, 'w') as f:
+        json.dump(chrome_trace(record), f)
+
+def step_metrics(record):
+    """Wall time per step plus the total and the UBT phases, for comparing runs"""
+    metrics = {step: result["seconds"] for step, result in record.get("steps", {}).items()
+               if result.get("status") != "skipped"}
+    build = record.get("build") or {}
+    if build.get("first_action") is not None:
+        metrics["compile: UBT startup"] = build["first_action"] - build["started"]
+    for verb, seconds in build.get("verbs", {}).items():
+        metrics[f"compile: {verb}"] = seconds
+    metrics["total"] = record.get("seconds", 0)
+    return metrics
+
+def compare(latest, previous):
+    """Rows of (metric, latest seconds, median of previous runs or None, regression flag)"""
+    rows = []
+    earlier = [step_metrics(run) for run in previous]
+    for metric, seconds in step_metrics(latest).items():
+        values = [metrics[metric] for metrics in earlier if metric in metrics]
+        median = statistics.median(values) if values else None
+        regression = (median is not None and seconds > median * REGRESSION_RATIO
+                      and seconds - median > REGRESSION_SECONDS)
+        rows.append((metric, seconds, median, regression))
+    return rows
+
+def format_comparison(runs, limit=10):
+    """Text table of the latest run against the median of up to limit runs before it"""
+    if not runs:
+        return "No runs recorded yet."
+    latest, previous = runs[-1], runs[-limit - 1:-1]
+    started = time.strftime("%Y-%m-%d %H:%M", time.localtime(latest.get("started_at", 0)))
+    lines = [f"Latest run {started}: {os.path.basename(latest.get('project', ''))} "
+             f"{latest.get('status')} in {latest.get('seconds', 0):.1f}s, "
+             f"{latest.get('cpu_seconds', 0):.1f}s CPU",
+             f"Compared with the median of {len(previous)} earlier runs of the project" if previous
+             else "No earlier runs of the project to compare with",
+             "",
+             f"{'':24} {'latest':>10} {'median':>10} {'change':>8}"]
+    for metric, seconds, median, regression in compare(latest, previous):
+        change = f"{100 * (seconds - median) / median:+.0f}%" if median else ""
+        median_text = f"{median:.1f}s" if median is not None else "-"
+        lines.append(f"{metric:24} {seconds:9.1f}s {median_text:>10} {change:>8}"
+                     + ("  << slower" if regression else ""))
+    details = []
+    for step, result in latest.get("steps", {}).items():
+        values = [f"{result['cpu_seconds']:.1f}s CPU" if result.get("cpu_seconds") is not None else "",
+                  f"peak {format_size(result['peak_rss'])}" if result.get("peak_rss") else "",
+                  f"{format_size(result['bytes_received'])} received" if result.get("bytes_received") else "",
+                  f"{format_size(result['bytes_cloned'])} cloned" if result.get("bytes_cloned") else "",
+                  f"{format_size(result['bytes_deleted'])} deleted" if result.get("bytes_deleted") else ""]
+        details.append(f"  {step}: " + ", ".join(value for value in values if value))
+    return "\n".join(lines + ["", "Resources of the latest run:"] + details)
+
+def main(argv):
+    history = History()
+    command = argv[0] if argv else "compare"
+    if command == "list":
+        for run in history.runs():
+            started = time.strftime("%Y-%m-%d %H:%M", time.localtime(run.get("started_at", 0)))
+            print(f"{run.get('id')}  {started}  {run.get('status'):8} {run.get('seconds', 0):8.1f}s  "
+                  f"{run.get('project')}")
+    elif command == "compare":
+        project = os.path.abspath(argv[1]) if len(argv) > 1 else None
+        runs = history.runs(project)
+        print(format_comparison(history.runs(runs[-1]["project"]) if runs and not project else runs))
+    elif command == "trace" and len(argv) > 1:
+        run = history.find(argv[2] if len(argv) > 2 else None)
+        if run is None:
+            print("No such run")
+            return 1
+        write_chrome_trace(run, argv[1])
+        print(f"Wrote trace of run {run['id']} to {argv[1]}, open it in chrome://tracing or ui.perfetto.dev")
+    else:
+        print("Usage: telemetry.py [list | compare [PROJECT] | trace OUTPUT.json [RUN_ID]]")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
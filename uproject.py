@@ -0,0 +1,100 @@
+import os
+import re
+import copy
+import json
+import tempfile
+import threading
+from contextlib import contextmanager
+
+INDENT_RE = re.compile(r"^([ \t]+)\S", re.MULTILINE)
+
+_projects = {}
+_projects_lock = threading.Lock()
+
+def load_uproject(project_path):
+    """The shared model of a .uproject, every caller sees the same one"""
+    path = os.path.abspath(project_path)
+    with _projects_lock:
+        if path not in _projects:
+            _projects[path] = UProject(path)
+        return _projects[path]
+
+def file_stamp(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+class UProject:
+    """A .uproject file parsed once and read again only when its size or mtime changed
+
+    Changes go through edit(), which writes the file only when its content
+    really changed and does so atomically, in the file's own indentation, line
+    endings and key order. Unreal reloads and rescans projects whose file was
+    touched, an unchanged project keeps its mtime.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.data = None
+        self.stamp = None
+        self.indent = "\t"
+        self.newline = "\n"
+        self.final_newline = False
+        self.bom = False
+        self.lock = threading.RLock()
+
+    def read(self):
+        """The parsed file, reloaded if it changed on disk. Do not modify it, use edit()"""
+        with self.lock:
+            stamp = file_stamp(self.path)
+            if stamp != self.stamp:
+                with open(self.path, 'rb') as f:
+                    raw = f.read()
+                self.bom = raw.startswith(b"\xef\xbb\xbf")
+                text = raw.decode("utf-8-sig")
+                self.data = json.loads(text)
+                self.stamp = stamp
+                match = INDENT_RE.search(text)
+                self.indent = match.group(1) if match else "\t"
+                self.newline = "\r\n" if "\r\n" in text else "\n"
+                self.final_newline = text.endswith("\n")
+            return self.data
+
+    def format(self, data):
+        text = json.dumps(data, indent=self.indent, ensure_ascii=False)
+        if self.final_newline:
+            text += "\n"
+        return text.replace("\n", self.newline)
+
+    @contextmanager
+    def edit(self):
+        """Modify a copy of the data in a with block, it is written back only if the block succeeds"""
+        with self.lock:
+            data = copy.deepcopy(self.read())
+            yield data
+            self.write(data)
+
+    def write(self, data):
+        """Atomically replace the file with data, returns whether the file had to be written"""
+        with self.lock:
+            # Semantically equal but differently formatted files are left alone as well
+            if data == self.read():
+                return False
+            text = self.format(data)
+            directory = os.path.dirname(self.path)
+            handle, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(self.path)}.", dir=directory)
+            try:
+                with os.fdopen(handle, 'wb') as f:
+                    f.write((b"\xef\xbb\xbf" if self.bom else b"") + text.encode("utf-8"))
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.chmod(temp_path, os.stat(self.path).st_mode & 0o7777)
+                os.replace(temp_path, self.path)
+            except BaseException:
+                try:
+                    os.unlink(temp_path)
+                except OSError:
+                    pass
+                raise
+            self.data = copy.deepcopy(data)
+            self.stamp = file_stamp(self.path)
+            return True